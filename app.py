@@ -1,13 +1,43 @@
 import os
+
+# --- Cooperative workers: gevent must patch the stdlib before sockets/threads are imported ---
+WORKER_CLASS = os.getenv("AUTOMATION_WORKER_CLASS", "sync").strip().lower()
+if WORKER_CLASS == "gevent":
+    from gevent import monkey
+    if not monkey.is_module_patched("socket"):
+        monkey.patch_all()
+
+import sys
 import datetime
 import requests
 import json
 import threading
 import time
-from google import genai
-import tweepy
-from flask import Flask, jsonify, request
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+# google-genai, tweepy and Pillow are imported where first used: they dominate import time and
+# per-worker memory, and health checks after a cold start need none of them.
+from flask import Flask, jsonify, request, Response
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess,
+)
 import io
+import atexit
+import logging
+import logging.handlers
+import queue
+import shutil
+import tempfile
+import random
+import contextvars
+import sqlite3
+import uuid
+import hashlib
+import re
+from collections import OrderedDict, deque
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
 
 # ==============================================================================
 # 1. CONFIGURATION & SECRETS LOADING (FOR RENDER/ENVIRONMENT)
@@ -15,8 +45,98 @@ import io
 
 app = Flask(__name__)
 
+# --- Structured Logging (JSON lines through a background queue) ---
+# DEBUG adds per-poll/per-chunk/per-retry detail; LOG_DEBUG_SAMPLE_RATE keeps that fraction of it.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1"))
+# "json" (one object per line, for log collectors) or "text" (the message plus its context).
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").strip().lower()
+
+# Fields (run_id, date, account, platform, stage) attached to every record logged in this context.
+_log_context = contextvars.ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """Adds fields to every log record emitted inside the block (and in contexts copied from it)."""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class LogContextFilter(logging.Filter):
+    """
+    Runs in the calling thread: stamps the record with the current log context and keeps
+    only LOG_DEBUG_SAMPLE_RATE of DEBUG records, before anything is queued.
+    """
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and LOG_DEBUG_SAMPLE_RATE < 1 and random.random() >= LOG_DEBUG_SAMPLE_RATE:
+            return False
+        record.context = _log_context.get()
+        return True
+
+
+class LogFormatter(logging.Formatter):
+    """JSON lines (time, level, message, context and `extra={"fields": {...}}`) or plain text."""
+
+    def __init__(self, json_lines):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record):
+        context = {key: value for key, value in {**getattr(record, "context", {}), **getattr(record, "fields", {})}.items()
+                   if value is not None}
+        if not self.json_lines:
+            prefix = " ".join(f"{key}={context[key]}" for key in ("run_id", "account", "platform") if key in context)
+            return f"[{prefix}] {record.getMessage()}" if prefix else record.getMessage()
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+            **context,
+        }
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+log = logging.getLogger("automation")
+log.setLevel(LOG_LEVEL)
+log.propagate = False
+_log_listener = None
+
+
+def start_log_listener():
+    """
+    (Re)attaches a QueueHandler and starts the thread that writes queued records to stderr.
+    Callers only append to an unbounded queue, so a slow or full pipe never blocks a post.
+    Called again in forked workers, where the master's listener thread does not exist.
+    """
+    global _log_listener
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(LogContextFilter())
+    for old in list(log.handlers):
+        log.removeHandler(old)
+    log.addHandler(handler)
+    output = logging.StreamHandler()
+    output.setFormatter(LogFormatter(json_lines=LOG_FORMAT != "text"))
+    _log_listener = logging.handlers.QueueListener(records, output)
+    _log_listener.start()
+
+
+def stop_log_listener():
+    """Flushes queued records (at exit, so CLI runs lose no output)."""
+    if _log_listener is not None:
+        _log_listener.stop()
+
+
+start_log_listener()
+atexit.register(stop_log_listener)
+
 # --- Load Secrets from Environment Variables (Render) ---
-print("Attempting to load secrets from Environment Variables (os.getenv)...")
+# Logged once per process that imports the app: with gunicorn --preload that is only the master.
 try:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     ACCESS_TOKEN_LI = os.getenv("ACCESS_TOKEN_LI")
@@ -28,9 +148,28 @@ try:
     X_ACCESS_TOKEN = os.getenv("X_ACCESS_TOKEN")
     X_ACCESS_SECRET = os.getenv("X_ACCESS_SECRET")
     REQUIRED_TRIGGER_KEY = os.getenv("TRIGGER_KEY", "growwithkishore2148")
-    print("✅ Successfully loaded all necessary secrets.")
+    missing = [name for name in (
+        "GEMINI_API_KEY", "ACCESS_TOKEN_LI", "PERSON_URN", "ACCESS_TOKEN_IG", "INSTAGRAM_BUSINESS_ID",
+        "CONSUMER_KEY", "CONSUMER_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_SECRET",
+    ) if not os.getenv(name)]
+    log.info("✅ Loaded secrets from environment variables." + (f" Missing: {', '.join(missing)}" if missing else ""))
 except Exception as e:
-    print(f"🛑 ERROR: Failed to load environment variables. Error: {e}")
+    log.error(f"🛑 ERROR: Failed to load environment variables. Error: {e}")
+
+# --- Accounts (several brands from one deployment) ---
+# Credentials each account carries; the default account reads them from the variables above.
+ACCOUNT_CREDENTIALS = (
+    "ACCESS_TOKEN_LI", "PERSON_URN", "ACCESS_TOKEN_IG", "INSTAGRAM_BUSINESS_ID",
+    "CONSUMER_KEY", "CONSUMER_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_SECRET",
+)
+DEFAULT_ACCOUNT_NAME = "default"
+# Extra accounts as a JSON list, inline or in a file (the file wins), e.g.
+# [{"name": "acme", "ACCESS_TOKEN_LI": "...", "PERSON_URN": "...", "platforms": ["linkedin_image"]}]
+# Optional per account: "platforms" (job keys to run) and "instagram_user_tags".
+AUTOMATION_ACCOUNTS = os.getenv("AUTOMATION_ACCOUNTS")
+AUTOMATION_ACCOUNTS_FILE = os.getenv("AUTOMATION_ACCOUNTS_FILE")
+# With several accounts in a run, each platform gets its own pool of this many workers.
+ACCOUNT_PLATFORM_CONCURRENCY = int(os.getenv("ACCOUNT_PLATFORM_CONCURRENCY", "4"))
 
 # --- GitHub Repo Info ---
 REPO_OWNER = "DATABASESK"
@@ -38,6 +177,15 @@ REPO_NAME = "kishore-personal-"
 BRANCH = "main"
 CONTENT_BASE_PATH = "content"
 
+# --- API Endpoints (overridable, e.g. to point at the offline benchmark's local stand-ins) ---
+GITHUB_RAW_ROOT_URL = os.getenv("GITHUB_RAW_ROOT_URL", "https://raw.githubusercontent.com")
+GITHUB_API_BASE_URL = os.getenv("GITHUB_API_BASE_URL", "https://api.github.com")
+# Optional; raises the GitHub contents API limit used by backfill listings (60/h anonymous).
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+LINKEDIN_API_BASE_URL = os.getenv("LINKEDIN_API_BASE_URL", "https://api.linkedin.com/v2")
+GRAPH_API_BASE_URL = os.getenv("GRAPH_API_BASE_URL", "https://graph.facebook.com/v17.0")
+X_MEDIA_UPLOAD_URL = os.getenv("X_MEDIA_UPLOAD_URL", "https://upload.twitter.com/1.1/media/upload.json")
+
 # --- Instagram Tagging Configuration ---
 INSTAGRAM_USER_TAGS = [
     {"username": "digi_aura_meena", "x": 0.2, "y": 0.8},
@@ -49,176 +197,1664 @@ INSTAGRAM_USER_TAGS = [
     {"username": "prabhas_samuell", "x": 0.4, "y": 0.1},
 ]
 
+# --- Platform Execution Configuration ---
+# "sequential" posts one platform after another (original behaviour); "parallel" runs
+# the platform jobs on a bounded thread pool while honouring PLATFORM_DEPENDENCIES.
+AUTOMATION_MODE = os.getenv("AUTOMATION_MODE", "sequential").strip().lower()
+PLATFORM_MAX_WORKERS = int(os.getenv("PLATFORM_MAX_WORKERS", "4"))
+PLATFORM_SPACING_SECONDS = float(os.getenv("PLATFORM_SPACING_SECONDS", "3"))
+# Comma-separated "job:prerequisite" pairs, e.g. "linkedin_article:linkedin_image".
+PLATFORM_DEPENDENCIES = os.getenv("PLATFORM_DEPENDENCIES", "linkedin_article:linkedin_image")
+
 # ==============================================================================
 # 2. DYNAMIC CONTENT SETUP & CONSTANTS
 # ==============================================================================
 
-TODAY_FOLDER = datetime.date.today().strftime("%Y-%m-%d")
-GITHUB_RAW_BASE_URL = (
-    f"https://raw.githubusercontent.com/{REPO_OWNER}/{REPO_NAME}/{BRANCH}/"
-    f"{CONTENT_BASE_PATH}/{TODAY_FOLDER}"
-)
-IMAGE_URL = f"{GITHUB_RAW_BASE_URL}/image.png"
-LINKEDIN_CAPTION_URL = f"{GITHUB_RAW_BASE_URL}/caption_linkedin.txt"
-INSTAGRAM_CAPTION_URL = f"{GITHUB_RAW_BASE_URL}/caption_instagram.txt"
-X_CAPTION_URL = f"{GITHUB_RAW_BASE_URL}/caption_x.txt"
+def content_base_url(date_folder):
+    """Raw GitHub URL of a day's content folder."""
+    return (
+        f"{GITHUB_RAW_ROOT_URL}/{REPO_OWNER}/{REPO_NAME}/{BRANCH}/"
+        f"{CONTENT_BASE_PATH}/{date_folder}"
+    )
+
+
+def current_content_date():
+    """Today's content folder name. Resolved per run, so long-lived workers roll over at midnight."""
+    return datetime.date.today().strftime("%Y-%m-%d")
+
+
+def parse_content_date(value):
+    """Normalizes a YYYY-MM-DD string; raises ValueError for anything else."""
+    return datetime.datetime.strptime(str(value).strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
 MAX_TWEET_LENGTH = 280
+# Uploaded X media expires after 24h; a resumed run re-uploads anything older than this.
+X_MEDIA_REUSE_SECONDS = 20 * 3600
+# LinkedIn upload URLs (and never-posted assets) go stale; older journaled registrations start over.
+LINKEDIN_UPLOAD_REUSE_SECONDS = float(os.getenv("LINKEDIN_UPLOAD_REUSE_SECONDS", str(12 * 3600)))
+
+# --- X Chunked Media Upload (INIT / APPEND / FINALIZE) ---
+X_UPLOAD_CHUNK_SIZE = int(os.getenv("X_UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Concurrent APPEND requests; X assembles segments by segment_index, so order does not matter.
+X_UPLOAD_PARALLELISM = int(os.getenv("X_UPLOAD_PARALLELISM", "2"))
+X_UPLOAD_STATUS_DEADLINE_SECONDS = float(os.getenv("X_UPLOAD_STATUS_DEADLINE_SECONDS", "60"))
+
+# --- Local State & Content Cache ---
+STATE_DIR = os.getenv("AUTOMATION_STATE_DIR", os.path.join(tempfile.gettempdir(), "social-automation"))
+CONTENT_CACHE_DIR = os.path.join(STATE_DIR, "content")
+CONTENT_CACHE_DAYS = int(os.getenv("CONTENT_CACHE_DAYS", "3"))
+# A bundle loaded within this window is reused as-is; older ones are revalidated via ETag.
+CONTENT_REVALIDATE_SECONDS = float(os.getenv("CONTENT_REVALIDATE_SECONDS", "300"))
+
+# --- HTTP Session Policy ---
+# Per-host keep-alive pool size and (connect, read) timeout. Unlisted hosts use the default.
+HTTP_HOST_POLICIES = {
+    urlsplit(GITHUB_RAW_ROOT_URL).hostname: {"pool_size": 8, "timeout": (5, 30)},
+    urlsplit(LINKEDIN_API_BASE_URL).hostname: {"pool_size": 4, "timeout": (5, 30)},
+    urlsplit(GRAPH_API_BASE_URL).hostname: {"pool_size": 4, "timeout": (5, 30)},
+    urlsplit(X_MEDIA_UPLOAD_URL).hostname: {"pool_size": 4, "timeout": (5, 60)},
+}
+HTTP_DEFAULT_POLICY = {"pool_size": 4, "timeout": (5, 60)}
+# tweepy sends requests without any timeout; its session gets this one (clamped to the run deadline).
+X_API_TIMEOUT = (5, 30)
+HTTP_RETRY_TOTAL = int(os.getenv("HTTP_RETRY_TOTAL", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+HTTP_RETRY_STATUSES = {500, 502, 503, 504}
+HTTP_IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+# --- Rate-Limit Scheduler ---
+# Platform whose quota a host's calls count against.
+RATE_LIMIT_HOSTS = {
+    urlsplit(LINKEDIN_API_BASE_URL).hostname: "linkedin",
+    urlsplit(GRAPH_API_BASE_URL).hostname: "instagram",
+    urlsplit(X_MEDIA_UPLOAD_URL).hostname: "x",
+    "api.twitter.com": "x",
+    "api.x.com": "x",
+    # Content fetches: a 429 (Retry-After) from GitHub is waited out and retried like any platform's.
+    urlsplit(GITHUB_RAW_ROOT_URL).hostname: "github",
+    urlsplit(GITHUB_API_BASE_URL).hostname: "github",
+}
+# Quotas every account shares (content is fetched once for all of them), so never account-qualified.
+SHARED_QUOTA_PLATFORMS = {"github"}
+# Longest we will hold a step back waiting for a rate-limit window to reset.
+RATE_LIMIT_MAX_DEFER_SECONDS = float(os.getenv("RATE_LIMIT_MAX_DEFER_SECONDS", "900"))
+# Used when a 429 carries no reset information (LinkedIn usually sends none).
+RATE_LIMIT_DEFAULT_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF_SECONDS", "60"))
+# Graph API usage percentage (X-App-Usage / X-Business-Use-Case-Usage) at which we stop calling.
+GRAPH_USAGE_THRESHOLD = float(os.getenv("GRAPH_USAGE_THRESHOLD", "95"))
+
+# --- Instagram Container Polling ---
+IG_POLL_INITIAL_DELAY = float(os.getenv("IG_POLL_INITIAL_DELAY", "1"))
+IG_POLL_MAX_DELAY = float(os.getenv("IG_POLL_MAX_DELAY", "15"))
+IG_POLL_DEADLINE_SECONDS = float(os.getenv("IG_POLL_DEADLINE_SECONDS", "300"))
+
+# --- Instagram User-Tag Validation (business discovery + container verdicts, cached) ---
+INSTAGRAM_TAG_VALIDATION = os.getenv("INSTAGRAM_TAG_VALIDATION", "1").strip().lower() not in ("0", "false", "no")
+# Good handles rarely go bad; bad ones are rechecked sooner in case they were fixed or made public.
+INSTAGRAM_TAG_VALID_TTL_SECONDS = float(os.getenv("INSTAGRAM_TAG_VALID_TTL_SECONDS", str(7 * 24 * 3600)))
+INSTAGRAM_TAG_INVALID_TTL_SECONDS = float(os.getenv("INSTAGRAM_TAG_INVALID_TTL_SECONDS", str(24 * 3600)))
+# Graph error codes business discovery returns for handles it cannot see. Personal public accounts
+# are among them yet can still be tagged, so these only mean "unknown", never "invalid".
+INSTAGRAM_UNDISCOVERABLE_USER_ERROR_CODES = {100, 110}
+
+# --- X Account Profile Cache ---
+# The handle is only needed for log lines and the tweet link, so it is cached (memory + disk)
+# and refreshed in the background rather than fetched with get_me() on every post.
+X_PROFILE_TTL_SECONDS = float(os.getenv("X_PROFILE_TTL_SECONDS", str(24 * 3600)))
+X_PROFILE_CACHE_PATH = os.path.join(STATE_DIR, "x_profile.json")
+
+# --- Run Deadline & Circuit Breakers ---
+# Overall budget of one run; every timeout, retry back-off and wait inside it is clamped to what is left.
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "900"))
+# A platform whose jobs fail this many runs in a row (on transport errors/5xx) is skipped...
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+# ...for this long, doubling after each failed half-open probe up to the maximum.
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "1800"))
+CIRCUIT_MAX_OPEN_SECONDS = float(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", str(6 * 3600)))
+# Platform job -> the circuit (API) it depends on.
+JOB_CIRCUITS = {"x": "x", "linkedin_image": "linkedin", "linkedin_article": "linkedin", "instagram": "instagram"}
+
+# --- Prewarm (Gemini output generated ahead of the posting window) ---
+PREWARM_ATTEMPTS = int(os.getenv("PREWARM_ATTEMPTS", "3"))
+
+# --- Backfill (catching up on several content dates) ---
+BACKFILL_MAX_CONCURRENCY = int(os.getenv("BACKFILL_MAX_CONCURRENCY", "2"))
+BACKFILL_MAX_DAYS = int(os.getenv("BACKFILL_MAX_DAYS", "31"))
+
+# --- Job Registry & Step Journal (shared SQLite state database) ---
+JOB_DB_PATH = os.path.join(STATE_DIR, "jobs.sqlite3")
+# Greenlets are cheap, so gevent workers can keep many more runs in flight than OS threads.
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "16" if WORKER_CLASS == "gevent" else "2"))
+# A queued/running job not updated for this long is assumed dead and may be claimed again.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "1800"))
+
+# --- Gemini Configuration ---
+GEMINI_MODEL = "gemini-2.5-flash"
+# Per-request timeout for generations (the SDK has none by default), clamped to the run deadline.
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120"))
+GEMINI_CACHE_PATH = os.path.join(STATE_DIR, "gemini_cache.json")
+GEMINI_CACHE_TTL_SECONDS = float(os.getenv("GEMINI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+GEMINI_CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "256"))
+
+# --- Image Derivatives (Pillow) ---
+# Per-platform upload profile: bounding box, optional aspect crop (width / height) and the
+# encodings the platform accepts; the smallest encoding wins. Instagram is absent because the
+# Graph API fetches the original image from GitHub itself.
+IMAGE_PROFILES = {
+    "linkedin": {"max_size": (1200, 1200), "aspect": None, "formats": ("JPEG",)},
+    "x": {"max_size": (1600, 1600), "aspect": None, "formats": ("WEBP", "JPEG")},
+}
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+IMAGE_DERIVATIVE_DIR = os.path.join(STATE_DIR, "derivatives")
+IMAGE_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+# Platforms whose captions get Gemini Alt Text (generated together in one request).
+ALT_TEXT_PLATFORMS = ("linkedin", "instagram")
+
+# Asset key -> file name inside the day's content folder.
+CONTENT_ASSETS = {
+    "image": "image.png",
+    "caption_linkedin": "caption_linkedin.txt",
+    "caption_instagram": "caption_instagram.txt",
+    "caption_x": "caption_x.txt",
+}
+
+# --- Multi-Image Posts (carousels) ---
+# Extra images sit next to image.png as image_2.png, image_3.png, ...; the folder is listed with
+# conditional GitHub contents API requests (a 304 does not count against the rate limit).
+CONTENT_MULTI_IMAGE = os.getenv("CONTENT_MULTI_IMAGE", "1").strip().lower() not in ("0", "false", "no")
+CONTENT_IMAGE_PATTERN = re.compile(r"image(?:_(\d+))?\.png")
+# Platform limits: Instagram carousels, LinkedIn multi-image posts and X tweets.
+PLATFORM_MAX_IMAGES = {"instagram": 10, "linkedin": 9, "x": 4}
+# Concurrent per-image requests (child containers, registrations, uploads) within one post.
+MULTI_IMAGE_PARALLELISM = int(os.getenv("MULTI_IMAGE_PARALLELISM", "4"))
+
+# --- Accounts ---
+
+def load_accounts():
+    """
+    The default account (credentials from the environment) followed by the accounts in
+    AUTOMATION_ACCOUNTS_FILE / AUTOMATION_ACCOUNTS. The default account is left out when extra
+    accounts are configured and it has no credentials of its own. Invalid entries are skipped.
+    """
+    default = {"name": DEFAULT_ACCOUNT_NAME, "platforms": None, "instagram_user_tags": INSTAGRAM_USER_TAGS}
+    default.update({key: os.getenv(key) for key in ACCOUNT_CREDENTIALS})
+
+    try:
+        if AUTOMATION_ACCOUNTS_FILE:
+            with open(AUTOMATION_ACCOUNTS_FILE) as f:
+                entries = json.load(f)
+        else:
+            entries = json.loads(AUTOMATION_ACCOUNTS or "[]")
+        if not isinstance(entries, list):
+            raise ValueError("expected a JSON list of accounts")
+    except (OSError, ValueError) as e:
+        log.error(f"🛑 Could not load the accounts config: {e}. Using the default account only.")
+        entries = []
+
+    accounts = []
+    for entry in entries:
+        name = str(entry.get("name", "")).strip() if isinstance(entry, dict) else ""
+        if (not re.fullmatch(r"[A-Za-z0-9_.-]+", name) or name == DEFAULT_ACCOUNT_NAME
+                or any(account["name"] == name for account in accounts)):
+            log.warning(f"⚠️ Ignoring account entry with a missing, invalid or duplicate name: {name!r}")
+            continue
+        platforms = entry.get("platforms")
+        if platforms is not None:
+            unknown = set(platforms) - set(JOB_CIRCUITS)
+            if unknown:
+                log.warning(f"⚠️ Account {name}: ignoring unknown platforms {', '.join(sorted(unknown))}.")
+            platforms = set(platforms) & set(JOB_CIRCUITS)
+        account = {
+            "name": name,
+            "platforms": platforms,
+            "instagram_user_tags": entry.get("instagram_user_tags", INSTAGRAM_USER_TAGS),
+        }
+        account.update({key: entry.get(key) for key in ACCOUNT_CREDENTIALS})
+        accounts.append(account)
+
+    if not accounts or any(default[key] for key in ACCOUNT_CREDENTIALS):
+        accounts.insert(0, default)
+    if len(accounts) > 1:
+        log.info(f"👥 Posting for {len(accounts)} accounts: {', '.join(account['name'] for account in accounts)}.")
+    return accounts
+
+
+ACCOUNTS = load_accounts()
 
 # ==============================================================================
 # 3. UTILITY FUNCTIONS (Content Fetching and Generation)
 # ==============================================================================
 
-def generate_alt_text(caption_text):
-    """Generates concise, descriptive Alt Text based on the post caption."""
-    if not GEMINI_API_KEY:
-        print("🛑 GEMINI_API_KEY is not set. Using default Alt Text.")
-        return "Digital marketing image by KISHORE S/growwithkishore."
+# --- Metrics & Stage Timing ---
 
+# Stage latencies range from sub-second cache hits to multi-minute Instagram processing.
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+STAGE_DURATION = Histogram(
+    "automation_stage_duration_seconds", "Duration of each posting stage.",
+    ["platform", "stage", "outcome"], buckets=STAGE_BUCKETS,
+)
+RUN_DURATION = Histogram(
+    "automation_run_duration_seconds", "Wall-clock duration of a full automation run.",
+    ["mode"], buckets=STAGE_BUCKETS,
+)
+PLATFORM_RESULTS = Counter(
+    "automation_platform_results_total", "Platform job outcomes.", ["platform", "result"],
+)
+GEMINI_CACHE_LOOKUPS = Counter(
+    "automation_gemini_cache_lookups_total", "Gemini generation cache lookups.", ["result"],
+)
+PREPARED_CONTENT_LOOKUPS = Counter(
+    "automation_prepared_content_lookups_total", "Posting-time reads of prewarmed content.", ["kind", "result"],
+)
+
+# Most recent spans as (platform, stage, outcome, seconds), for the report and benchmarks.
+RECENT_SPANS = deque(maxlen=10000)
+
+
+@contextmanager
+def stage_span(platform, stage):
+    """
+    Times a stage into STAGE_DURATION. The outcome is "error" if the block raises, otherwise
+    "ok" unless the block sets span["outcome"] on the yielded dict (e.g. to "failed").
+    """
+    started = time.perf_counter()
+    span = {"outcome": None}
+    outcome = "error"
     try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
-
-        system_instruction = (
-            "You are an expert in social media accessibility and SEO. Analyze the provided post caption "
-            "and generate a concise, descriptive, and informative **Alt Text** for the accompanying image. "
-            "The Alt Text should be a short sentence or phrase describing the image's visual content, "
-            "and **MUST** naturally include the name 'KISHORE S' and the company 'growwithkishore'. "
-            "**DO NOT** use the phrases 'Image of' or 'Picture of'. "
-            "Keep the response to **under 250 characters**."
-        )
+        with log_context(stage=stage):
+            yield span
+        outcome = span["outcome"] or "ok"
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.labels(platform, stage, outcome).observe(elapsed)
+        RECENT_SPANS.append((platform, stage, outcome, elapsed))
 
-        print("🤖 Generating Alt Text with Gemini...")
-        prompt_text = f"The image is for a post with the following caption: '{caption_text}'. Generate Alt Text for the image."
 
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt_text,
-            config={
-                "system_instruction": system_instruction,
-                "temperature": 0.5,
-            }
-        )
+def render_metrics():
+    """Prometheus exposition for this process, or for all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
 
-        alt_text = response.text.strip()
 
-        if len(alt_text) > 250:
-            alt_text = alt_text[:247] + "..."
+# --- Per-Run Statistics ---
 
-        print(f"✅ Generated Alt Text (Length: {len(alt_text)}): {alt_text}")
-        return alt_text
+# Set by run_automation_sequence to a dict; platform functions add timings to it and the
+# run summary logs them. Worker threads inherit it through contextvars.copy_context().
+_run_stats = contextvars.ContextVar("run_stats", default=None)
+# Job-registry run id of the current run, if it was started through the registry.
+_current_run_id = contextvars.ContextVar("current_run_id", default=None)
 
-    except Exception as e:
-        print(f"🛑 Gemini API Error during Alt Text generation: {e}")
-        return "Digital marketing graphic featuring tips or statistics, created by KISHORE S for growwithkishore."
 
+def record_run_stat(name, value):
+    """Records a named statistic for the current run (no-op outside a run)."""
+    stats = _run_stats.get()
+    if stats is not None:
+        stats[name] = value
 
-def generate_gemini_article_text():
-    """Generates a long, detailed LinkedIn article."""
-    if not GEMINI_API_KEY:
-        print("🛑 GEMINI_API_KEY is not set. Aborting content generation.")
+
+# --- Current Account ---
+
+# Account the current platform job posts as (None outside a job).
+_current_account = contextvars.ContextVar("account", default=None)
+
+
+def current_account():
+    """The current job's account; outside a job, the first configured account."""
+    return _current_account.get() or ACCOUNTS[0]
+
+
+def account_key(key, account=None):
+    """
+    Qualifies a job, journal or quota key with the account ("x@acme"). The default account
+    keeps the bare key, so single-account registry rows and journals read as before.
+    """
+    account = account or current_account()
+    return key if account["name"] == DEFAULT_ACCOUNT_NAME else f"{key}@{account['name']}"
+
+
+# --- Run Deadline ---
+
+# Monotonic time by which the current run must finish (None outside a run).
+_run_deadline = contextvars.ContextVar("run_deadline", default=None)
+# Set of platforms that had transport failures (connection errors, timeouts, 5xx) in the current job.
+_platform_faults = contextvars.ContextVar("platform_faults", default=None)
+
+
+class RunDeadlineExceeded(requests.exceptions.RequestException):
+    """Raised instead of starting a call, retry or wait the run's remaining budget cannot cover."""
+
+
+def remaining_run_time():
+    """Seconds left in the current run's budget, or None outside a run."""
+    deadline = _run_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def clamp_timeout(timeout):
+    """Clamps a requests timeout (seconds or a (connect, read) pair) to the run's remaining budget."""
+    remaining = remaining_run_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise RunDeadlineExceeded("run deadline reached")
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining) if timeout is not None else remaining
+
+
+def sleep_within_deadline(seconds):
+    """time.sleep that refuses to wait past the run deadline."""
+    remaining = remaining_run_time()
+    if remaining is not None and seconds >= remaining:
+        raise RunDeadlineExceeded(f"waiting {seconds:.0f}s would pass the run deadline ({max(0, remaining):.0f}s left)")
+    time.sleep(seconds)
+
+
+def note_platform_fault(platform):
+    """Marks a transport-level failure against the platform for the current job's circuit breaker."""
+    faults = _platform_faults.get()
+    if faults is not None and platform:
+        faults.add(platform)
+
+
+# --- Per-Item Concurrency ---
+
+def map_in_context(func, items, max_workers, thread_name_prefix):
+    """
+    list(map(func, items)) on a bounded pool, each call in a copy of the caller's context so
+    run statistics and the run id follow it. The first exception is re-raised.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))),
+                            thread_name_prefix=thread_name_prefix) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, func, item) for item in items]
+        return [future.result() for future in futures]
+
+
+# --- Cooperative Scheduling (gevent workers) ---
+
+def run_blocking(func, *args, **kwargs):
+    """
+    Calls CPU-bound work (e.g. Pillow encoding) without stalling other greenlets: on gevent
+    workers it runs on the hub's native threadpool, otherwise it is simply called inline.
+    """
+    if WORKER_CLASS != "gevent":
+        return func(*args, **kwargs)
+    import gevent
+    return gevent.get_hub().threadpool.apply(func, args, kwargs)
+
+
+# --- Shared HTTP Sessions ---
+
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+
+def _http_session_for(url):
+    """Returns (session, policy) for the URL's host, creating a pooled keep-alive session on first use."""
+    host = urlsplit(url).hostname or ""
+    policy = HTTP_HOST_POLICIES.get(host, HTTP_DEFAULT_POLICY)
+    with _http_sessions_lock:
+        session = _http_sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=policy["pool_size"])
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_sessions[host] = session
+    return session, policy
+
+
+# --- Rate-Limit Scheduler ---
+
+class RateLimitDeferred(requests.exceptions.RequestException):
+    """Raised when a call would have to wait longer than RATE_LIMIT_MAX_DEFER_SECONDS for quota."""
+
+    def __init__(self, bucket, wait_seconds):
+        super().__init__(f"Rate limit for {bucket[0]} {bucket[1]} resets in {wait_seconds:.0f}s; step deferred.")
+        self.bucket = bucket
+        self.wait_seconds = wait_seconds
+
+
+class RateLimitScheduler:
+    """
+    Token buckets per (platform, endpoint), refilled from the platforms' own rate-limit headers:
+    X's x-rate-limit-* / x-user-limit-24hour-*, the Graph API's X-App-Usage and
+    X-Business-Use-Case-Usage, and Retry-After. Endpoint "*" holds platform-wide limits.
+    A call first takes a token; when a bucket is empty the caller sleeps until its reset
+    (up to RATE_LIMIT_MAX_DEFER_SECONDS) instead of spending a request on a certain 429.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_for(method, url):
+        """Normalized "METHOD /path" with ids replaced, e.g. "POST /v17.0/{id}/media"."""
+        segments = []
+        for segment in urlsplit(url).path.split("/"):
+            if re.search(r"\d", segment) and not re.fullmatch(r"v?\d+(\.\d+)*", segment):
+                segment = "{id}"
+            segments.append(segment)
+        return f"{method.upper()} {'/'.join(segments)}"
+
+    def acquire(self, platform, endpoint, max_wait=None):
+        """Takes a token for the call, sleeping until the bucket resets if it is empty."""
+        max_wait = RATE_LIMIT_MAX_DEFER_SECONDS if max_wait is None else max_wait
+        while True:
+            with self._lock:
+                now = time.time()
+                wait_seconds, blocking = 0, None
+                for bucket in ((platform, "*"), (platform, endpoint)):
+                    state = self._buckets.get(bucket)
+                    if state is None:
+                        continue
+                    if now >= state["reset_at"]:
+                        del self._buckets[bucket]
+                    elif state["remaining"] <= 0 and state["reset_at"] - now > wait_seconds:
+                        wait_seconds, blocking = state["reset_at"] - now, bucket
+                if blocking is None:
+                    state = self._buckets.get((platform, endpoint))
+                    if state is not None:
+                        state["remaining"] -= 1
+                    return
+
+            if wait_seconds > max_wait:
+                raise RateLimitDeferred(blocking, wait_seconds)
+            log.warning(f"⏳ Rate limit for {blocking[0]} {blocking[1]} exhausted; deferring {wait_seconds:.0f}s until reset...")
+            sleep_within_deadline(wait_seconds)
+
+    def observe(self, platform, endpoint, response):
+        """Updates buckets from a response's headers. Returns seconds until retry for a 429, else None."""
+        headers = response.headers
+        now = time.time()
+
+        if "x-rate-limit-remaining" in headers and "x-rate-limit-reset" in headers:
+            self._set(platform, endpoint, int(headers["x-rate-limit-remaining"]), float(headers["x-rate-limit-reset"]))
+        if "x-user-limit-24hour-remaining" in headers and "x-user-limit-24hour-reset" in headers:
+            self._set(platform, "*", int(headers["x-user-limit-24hour-remaining"]),
+                      float(headers["x-user-limit-24hour-reset"]))
+
+        usage_reset = self._graph_usage_reset(headers, now)
+        if usage_reset:
+            self._set(platform, "*", 0, usage_reset)
+
+        if response.status_code != 429:
+            return None
+
+        retry_after = headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            reset_at = now + int(retry_after)
+        else:
+            with self._lock:
+                known = [self._buckets[b]["reset_at"] for b in ((platform, endpoint), (platform, "*"))
+                         if b in self._buckets and self._buckets[b]["reset_at"] > now]
+            reset_at = max(known) if known else now + RATE_LIMIT_DEFAULT_BACKOFF_SECONDS
+        self._set(platform, endpoint, 0, reset_at)
+        return reset_at - now
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            return {
+                f"{platform} {endpoint}": {"remaining": state["remaining"], "resets_in": round(state["reset_at"] - now)}
+                for (platform, endpoint), state in self._buckets.items() if state["reset_at"] > now
+            }
+
+    def _set(self, platform, endpoint, remaining, reset_at):
+        with self._lock:
+            self._buckets[(platform, endpoint)] = {"remaining": remaining, "reset_at": reset_at}
+
+    @staticmethod
+    def _graph_usage_reset(headers, now):
+        """Reset time if Graph API usage headers report the app/business quota as (nearly) spent."""
+        usages = []
+        try:
+            if "X-App-Usage" in headers:
+                usages.append((json.loads(headers["X-App-Usage"]), None))
+            if "X-Business-Use-Case-Usage" in headers:
+                for entries in json.loads(headers["X-Business-Use-Case-Usage"]).values():
+                    for entry in entries:
+                        usages.append((entry, entry.get("estimated_time_to_regain_access")))
+        except (ValueError, AttributeError):
+            return None
+
+        for usage, regain_minutes in usages:
+            peak = max(usage.get(k, 0) for k in ("call_count", "total_time", "total_cputime"))
+            if peak >= GRAPH_USAGE_THRESHOLD:
+                # Graph quotas are rolling one-hour windows; prefer Meta's own estimate when given.
+                return now + (regain_minutes * 60 if regain_minutes else RATE_LIMIT_DEFAULT_BACKOFF_SECONDS * 5)
         return None
 
+
+RATE_LIMITER = RateLimitScheduler()
+
+
+class DeadlineTimeoutAdapter(HTTPAdapter):
+    """Gives every request of a third-party session (tweepy's) a timeout clamped to the run deadline."""
+
+    def __init__(self, timeout, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+
+    def send(self, request, **kwargs):
+        kwargs["timeout"] = clamp_timeout(kwargs.get("timeout") or self.timeout)
+        return super().send(request, **kwargs)
+
+
+def observe_rate_limit_response(response, *args, **kwargs):
+    """requests response hook that feeds third-party sessions (e.g. tweepy's) into RATE_LIMITER."""
+    platform = RATE_LIMIT_HOSTS.get(urlsplit(response.url).hostname or "")
+    if platform:
+        RATE_LIMITER.observe(platform if platform in SHARED_QUOTA_PLATFORMS else account_key(platform), RateLimitScheduler.endpoint_for(response.request.method, response.url),
+                             response)
+    return response
+
+
+def http_request(method, url, retry=None, **kwargs):
+    """
+    Sends a request through the shared per-host session with the host's default timeout.
+    Connection errors, timeouts and 5xx responses are retried with exponential backoff
+    when `retry` is true, which defaults to True only for idempotent methods; callers
+    opt POSTs in explicitly when repeating them cannot double-post.
+    Calls to rate-limited platforms go through RATE_LIMITER (per account): they wait for quota first,
+    and a 429 (which the platform rejected, so any method may repeat it) is retried once after reset.
+    Inside a run, timeouts and waits are clamped to the run deadline (RunDeadlineExceeded past it),
+    and a final transport failure counts against the platform's circuit breaker.
+    """
+    method = method.upper()
+    session, policy = _http_session_for(url)
+    timeout = kwargs.pop("timeout", policy["timeout"])
+    if retry is None:
+        retry = method in HTTP_IDEMPOTENT_METHODS
+    attempts = HTTP_RETRY_TOTAL + 1 if retry else 1
+    platform = RATE_LIMIT_HOSTS.get(urlsplit(url).hostname or "")
+    quota = platform if platform in SHARED_QUOTA_PLATFORMS else account_key(platform) if platform else None
+    endpoint = RateLimitScheduler.endpoint_for(method, url)
+    deferred = False
+
+    attempt = 0
+    while attempt < attempts:
+        attempt += 1
+        try:
+            if quota:
+                RATE_LIMITER.acquire(quota, endpoint)
+            response = session.request(method, url, timeout=clamp_timeout(timeout), **kwargs)
+            if quota:
+                retry_in = RATE_LIMITER.observe(quota, endpoint, response)
+                if retry_in is not None and not deferred and retry_in <= RATE_LIMIT_MAX_DEFER_SECONDS:
+                    # The next acquire() sleeps until the reset this 429 reported.
+                    log.warning(f"⏳ {quota} returned 429 for {endpoint}; deferring until reset ({retry_in:.0f}s).")
+                    deferred = True
+                    attempt -= 1
+                    continue
+            if response.status_code not in HTTP_RETRY_STATUSES or attempt == attempts:
+                if response.status_code >= 500:
+                    note_platform_fault(platform)
+                return response
+            reason = f"HTTP {response.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == attempts:
+                note_platform_fault(platform)
+                raise
+            reason = type(e).__name__
+
+        delay = HTTP_RETRY_BACKOFF * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        log.warning(f"⏳ {method} {urlsplit(url).hostname} failed ({reason}); retrying in {delay:.1f}s "
+                    f"(retry {attempt}/{attempts - 1})...")
+        sleep_within_deadline(delay)
+
+
+def _atomic_write(path, data):
+    """Writes bytes via a temp file + rename so concurrent workers never read partial files."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
     try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
-
-        system_instruction = (
-            "You are a savvy digital marketing expert. Generate a **long, detailed, and highly valuable** "
-            "LinkedIn article structured as **'Real-World Digital Marketing Tips and Tricks'**. "
-            "Use a headline in **ALL CAPS** for impact, and break down the tips using **numbered headings** followed by double line breaks. "
-            "**DO NOT use asterisk symbols (*)** for formatting or bolding, use line breaks and numbering for clarity. "
-            "The content should maximize information density. "
-            "The **ENTIRE POST MUST NOT EXCEED 2,500 CHARACTERS** (including all headings and signatures). "
-            "Crucially, the content must naturally include the name 'KISHORE S' and the handle '@growwithkishore' "
-            "at least once, which is vital for search engine visibility. End the post with relevant hashtags."
-        )
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def connect_state_db(path):
+    """
+    Opens the shared SQLite state database in autocommit/WAL mode. A short-lived connection
+    per operation keeps callers safe across threads, gunicorn workers and forks.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+# --- Gemini Client & Generation Cache ---
+
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """Returns the process-wide Gemini client, creating it on first use."""
+    global _gemini_client
+    with _gemini_client_lock:
+        if _gemini_client is None:
+            from google import genai
+
+            _gemini_client = genai.Client(api_key=GEMINI_API_KEY,
+                                          http_options={"timeout": int(GEMINI_TIMEOUT_SECONDS * 1000)})
+        return _gemini_client
 
-        print("🤖 Generating LONG, Cleanly Formatted Article Content with Gemini API...")
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents="Generate today's real-world digital marketing tips and tricks article.",
-            config={
-                "system_instruction": system_instruction,
-            }
-        )
 
-        return response.text.strip()
+class GenerationCache:
+    """
+    Persistent, content-addressed cache of Gemini responses with TTL and LRU eviction.
+    Entries live in a JSON file so every gunicorn worker (and every restart) can reuse them;
+    the file is re-read whenever another process has written it since our last look.
+    """
+
+    def __init__(self, path, ttl_seconds, max_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(prompt, system_instruction, model, temperature, response_schema=None):
+        parts = [prompt, system_instruction, model, temperature]
+        if response_schema is not None:
+            parts.append(response_schema)
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created_at"] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                GEMINI_CACHE_LOOKUPS.labels("miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            GEMINI_CACHE_LOOKUPS.labels("hit").inc()
+            return entry["value"]
+
+    def put(self, key, value):
+        with self._lock:
+            self._reload_if_changed()
+            self._entries[key] = {"value": value, "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                _atomic_write(self.path, json.dumps(self._entries).encode("utf-8"))
+                self._mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                log.warning(f"⚠️ Could not persist Gemini cache to {self.path}: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path) as f:
+                self._entries = OrderedDict(json.load(f))
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠️ Ignoring unreadable Gemini cache {self.path}: {e}")
+        self._mtime = mtime
+
+
+GEMINI_CACHE = GenerationCache(GEMINI_CACHE_PATH, GEMINI_CACHE_TTL_SECONDS, GEMINI_CACHE_MAX_ENTRIES)
+
+
+def generate_cached_content(prompt, system_instruction, model=GEMINI_MODEL, temperature=None,
+                            response_schema=None, validate=None, consume_stream=None):
+    """
+    Returns Gemini's stripped response text for the prompt, served from GEMINI_CACHE when an
+    identical (prompt, system instruction, model, temperature) request was answered before.
+    With `response_schema`, Gemini is asked for JSON matching that schema. With `consume_stream`,
+    the response is streamed and `consume_stream(chunks)` builds the text as it arrives (raising
+    ValueError to reject it early). API errors propagate to the caller; a response rejected by
+    `validate(text)` raises ValueError and is not cached (nor served, if cached earlier).
+    """
+    key = GenerationCache.make_key(prompt, system_instruction, model, temperature, response_schema)
+    cached = GEMINI_CACHE.get(key)
+    if cached is not None and (validate is None or validate(cached)):
+        log.debug(f"♻️ Gemini cache hit ({key[:12]}).")
+        return cached
+
+    config = {"system_instruction": system_instruction}
+    if temperature is not None:
+        config["temperature"] = temperature
+    if response_schema is not None:
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = response_schema
+    # Milliseconds; raises RunDeadlineExceeded instead of starting past the run deadline.
+    config["http_options"] = {"timeout": int(clamp_timeout(GEMINI_TIMEOUT_SECONDS) * 1000)}
+    if consume_stream is not None:
+        chunks = get_gemini_client().models.generate_content_stream(model=model, contents=prompt, config=config)
+        try:
+            text = consume_stream(chunks).strip()
+        finally:
+            # Stops the download if the consumer gave up early.
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+    else:
+        response = get_gemini_client().models.generate_content(model=model, contents=prompt, config=config)
+        text = (response.text or "").strip()
+    if validate is not None and not validate(text):
+        raise ValueError(f"Gemini response failed validation: {text[:100]!r}")
+    GEMINI_CACHE.put(key, text)
+    return text
+
+
+ALT_TEXT_MAX_LENGTH = 250
+ALT_TEXT_DEFAULT_NO_KEY = "Digital marketing image by KISHORE S/growwithkishore."
+ALT_TEXT_DEFAULT_ON_ERROR = "Digital marketing graphic featuring tips or statistics, created by KISHORE S for growwithkishore."
+
+
+def _clamp_alt_text(alt_text):
+    if len(alt_text) > ALT_TEXT_MAX_LENGTH:
+        alt_text = alt_text[:ALT_TEXT_MAX_LENGTH - 3] + "..."
+    return alt_text
+
+
+def _is_json_object(text):
+    try:
+        return isinstance(json.loads(text), dict)
+    except ValueError:
+        return False
+
+
+def generate_alt_texts(captions):
+    """
+    Generates Alt Text for several captions in a single structured Gemini request.
+    `captions` maps a key (e.g. platform name) to caption text; the result maps the same keys
+    to Alt Text clamped to 250 characters, using the default Alt Text for any missing item.
+    """
+    if not captions:
+        return {}
+    if not GEMINI_API_KEY:
+        log.warning("🛑 GEMINI_API_KEY is not set. Using default Alt Text.")
+        return {key: ALT_TEXT_DEFAULT_NO_KEY for key in captions}
+
+    keys = sorted(captions)
+    system_instruction = (
+        "You are an expert in social media accessibility and SEO. You receive a JSON object that maps "
+        "post identifiers to post captions. For each caption, generate a concise, descriptive, and informative "
+        "**Alt Text** for the accompanying image. "
+        "Each Alt Text should be a short sentence or phrase describing the image's visual content, "
+        "and **MUST** naturally include the name 'KISHORE S' and the company 'growwithkishore'. "
+        "**DO NOT** use the phrases 'Image of' or 'Picture of'. "
+        "Keep each Alt Text **under 250 characters**. "
+        "Return a JSON object with exactly the same keys, each mapped to its Alt Text."
+    )
+    response_schema = {
+        "type": "OBJECT",
+        "properties": {key: {"type": "STRING"} for key in keys},
+        "required": keys,
+    }
+    prompt_text = (
+        "Generate Alt Text for the image of each of these posts:\n"
+        + json.dumps({key: captions[key] for key in keys}, ensure_ascii=False, indent=2)
+    )
 
+    try:
+        log.info(f"🤖 Generating Alt Text with Gemini for {len(keys)} caption(s) in one request...")
+        with stage_span("shared", "gemini_alt_text"):
+            generated = json.loads(generate_cached_content(
+                prompt_text, system_instruction, temperature=0.5,
+                response_schema=response_schema, validate=_is_json_object,
+            ))
     except Exception as e:
-        print(f"🛑 Gemini API Error: Could not generate content. Error: {e}")
+        log.error(f"🛑 Gemini API Error during Alt Text generation: {e}")
+        generated = {}
+
+    alt_texts = {}
+    for key in keys:
+        value = generated.get(key)
+        if isinstance(value, str) and value.strip():
+            alt_texts[key] = _clamp_alt_text(value.strip())
+            log.info(f"✅ Generated Alt Text for {key} (Length: {len(alt_texts[key])}): {alt_texts[key]}")
+        else:
+            log.warning(f"⚠️ No Alt Text returned for {key}. Using default Alt Text.")
+            alt_texts[key] = ALT_TEXT_DEFAULT_ON_ERROR
+    return alt_texts
+
+
+def generate_alt_text(caption_text):
+    """Generates concise, descriptive Alt Text based on the post caption."""
+    return generate_alt_texts({"post": caption_text})["post"]
+
+
+ARTICLE_MAX_LENGTH = 2500
+ARTICLE_REQUIRED_MENTIONS = ("KISHORE S", "@growwithkishore")
+ARTICLE_GENERATION_ATTEMPTS = int(os.getenv("ARTICLE_GENERATION_ATTEMPTS", "2"))
+ARTICLE_SYSTEM_INSTRUCTION = (
+    "You are a savvy digital marketing expert. Generate a **long, detailed, and highly valuable** "
+    "LinkedIn article structured as **'Real-World Digital Marketing Tips and Tricks'**. "
+    "Use a headline in **ALL CAPS** for impact, and break down the tips using **numbered headings** followed by double line breaks. "
+    "**DO NOT use asterisk symbols (*)** for formatting or bolding, use line breaks and numbering for clarity. "
+    "The content should maximize information density. "
+    "The **ENTIRE POST MUST NOT EXCEED 2,500 CHARACTERS** (including all headings and signatures). "
+    "Crucially, the content must naturally include the name 'KISHORE S' and the handle '@growwithkishore' "
+    "at least once, which is vital for search engine visibility. End the post with relevant hashtags."
+)
+
+
+def article_prompt(date_folder):
+    """The article prompt for a content date. The date is part of it, so each day gets its own cache entry."""
+    return f"Generate today's ({date_folder}) real-world digital marketing tips and tricks article."
+
+
+def validate_article_text(text):
+    """True if the article keeps the prompt's hard rules: length, no asterisks and the required mentions."""
+    return (
+        bool(text) and len(text) <= ARTICLE_MAX_LENGTH and "*" not in text
+        and all(mention in text for mention in ARTICLE_REQUIRED_MENTIONS)
+    )
+
+
+def consume_article_stream(chunks):
+    """
+    Builds the article from streamed chunks, enforcing the prompt's hard rules as text arrives:
+    asterisks are dropped, and once the text passes ARTICLE_MAX_LENGTH the stream is abandoned
+    and the article is cut back to its last complete paragraph. Raises ValueError if a required
+    mention is missing (or the cut leaves nothing usable), so the caller can regenerate.
+    """
+    started = time.monotonic()
+    parts, length, overflowed = [], 0, False
+    for chunk in chunks:
+        if not parts:
+            record_run_stat("gemini_article_first_chunk_s", round(time.monotonic() - started, 2))
+        piece = (chunk.text or "").replace("*", "")
+        parts.append(piece)
+        length += len(piece)
+        if length > ARTICLE_MAX_LENGTH:
+            overflowed = True
+            break
+
+    text = "".join(parts).strip()
+    if overflowed:
+        cut = text.rfind("\n\n", 0, ARTICLE_MAX_LENGTH + 1)
+        text = text[:cut].rstrip() if cut > 0 else ""
+        log.info(f"✂️ Article exceeded {ARTICLE_MAX_LENGTH} characters; cut to {len(text)} at a paragraph break.")
+
+    missing = [mention for mention in ARTICLE_REQUIRED_MENTIONS if mention not in text]
+    if not text or missing:
+        raise ValueError(f"article is missing {missing or 'content'}")
+    return text
+
+
+def generate_gemini_article_text(date_folder=None, attempts=ARTICLE_GENERATION_ATTEMPTS):
+    """
+    Generates a long, detailed LinkedIn article for the given content date (default: today).
+    The response is streamed and validated as it arrives; unusable output is regenerated up
+    to `attempts` times and never returned (returns None instead).
+    """
+    if not GEMINI_API_KEY:
+        log.error("🛑 GEMINI_API_KEY is not set. Aborting content generation.")
         return None
 
+    prompt_text = article_prompt(date_folder or current_content_date())
+    for attempt in range(1, attempts + 1):
+        try:
+            log.info("🤖 Generating LONG, Cleanly Formatted Article Content with Gemini API...")
+            with stage_span("linkedin_article", "gemini_article"):
+                return generate_cached_content(
+                    prompt_text, ARTICLE_SYSTEM_INSTRUCTION,
+                    validate=validate_article_text, consume_stream=consume_article_stream,
+                )
+        except ValueError as e:
+            log.warning(f"⚠️ Article attempt {attempt}/{attempts} was unusable ({e}).")
+        except Exception as e:
+            log.error(f"🛑 Gemini API Error: Could not generate content. Error: {e}")
+            return None
+    return None
+
+
+# --- Image Derivatives ---
+
+def _encode_image(img, fmt):
+    """Encodes a Pillow image without metadata; JPEG output is flattened onto white."""
+    from PIL import Image
+
+    out = io.BytesIO()
+    if fmt == "JPEG":
+        if img.mode in ("RGBA", "LA", "P"):
+            rgba = img.convert("RGBA")
+            flattened = Image.new("RGB", rgba.size, (255, 255, 255))
+            flattened.paste(rgba, mask=rgba.getchannel("A"))
+            img = flattened
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(out, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    elif fmt == "WEBP":
+        img.save(out, "WEBP", quality=IMAGE_QUALITY, method=6)
+    else:
+        img.save(out, fmt, optimize=True)
+    return out.getvalue()
+
+
+def build_image_derivative(source, profile):
+    """
+    Returns (bytes, mime_type) for the profile: EXIF-rotated, aspect-cropped, bounded to
+    max_size and re-encoded in the smallest accepted format. Falls back to the source bytes
+    when re-encoding would not make the upload smaller.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(source)) as original:
+        source_format = original.format
+        img = ImageOps.exif_transpose(original)
+        if profile.get("aspect"):
+            width, height = img.size
+            if width / height > profile["aspect"]:
+                width = round(height * profile["aspect"])
+            else:
+                height = round(width / profile["aspect"])
+            img = ImageOps.fit(img, (width, height), Image.LANCZOS)
+        resized = img.size != original.size
+        img.thumbnail(profile["max_size"], Image.LANCZOS)
+        resized = resized or img.size != original.size
+
+        best_data, best_format = None, None
+        for fmt in profile["formats"]:
+            data = _encode_image(img, fmt)
+            if best_data is None or len(data) < len(best_data):
+                best_data, best_format = data, fmt
+
+    if not resized and len(best_data) >= len(source) and source_format in profile["formats"] + ("PNG",):
+        return source, IMAGE_MIME_TYPES.get(source_format, "application/octet-stream")
+    return best_data, IMAGE_MIME_TYPES[best_format]
+
+
+def get_image_derivative(source, platform):
+    """
+    Platform-specific derivative of the source image, cached on disk under IMAGE_DERIVATIVE_DIR
+    by (source hash, profile). Returns (bytes, mime_type); the original bytes are returned for
+    platforms without a profile or if Pillow cannot process the image.
+    """
+    profile = IMAGE_PROFILES.get(platform)
+    if profile is None:
+        return source, "image/png"
+
+    profile_key = json.dumps([profile, IMAGE_QUALITY], sort_keys=True)
+    key = hashlib.sha256(hashlib.sha256(source).digest() + profile_key.encode("utf-8")).hexdigest()
+    for fmt, mime_type in IMAGE_MIME_TYPES.items():
+        cache_path = os.path.join(IMAGE_DERIVATIVE_DIR, f"{key}.{fmt.lower()}")
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                return f.read(), mime_type
 
-def fetch_caption(caption_url):
-    """Fetches the caption text from the GitHub raw URL."""
     try:
-        response = requests.get(caption_url)
-        response.raise_for_status()
-        return response.text.strip()
-    except requests.exceptions.HTTPError as e:
-        print(f"🛑 Error: Could not find content at {caption_url}. (HTTP Status {e.response.status_code})")
-        print("     Ensure the folder and file names are correct for the current date.")
-        return None
-    except requests.exceptions.RequestException as e:
-        print(f"🛑 Network Error fetching caption from {caption_url}: {e}")
-        return None
+        data, mime_type = run_blocking(build_image_derivative, source, profile)
+    except Exception as e:
+        log.warning(f"⚠️ Could not build {platform} image derivative ({e}). Uploading the original.")
+        return source, "image/png"
 
-# ==============================================================================
-# 4. LINKEDIN POSTING FUNCTIONS
-# ==============================================================================
+    fmt = next(f for f, m in IMAGE_MIME_TYPES.items() if m == mime_type)
+    try:
+        os.makedirs(IMAGE_DERIVATIVE_DIR, exist_ok=True)
+        _atomic_write(os.path.join(IMAGE_DERIVATIVE_DIR, f"{key}.{fmt.lower()}"), data)
+    except OSError as e:
+        log.warning(f"⚠️ Could not cache {platform} image derivative: {e}")
+    log.debug(f"🖼️ {platform} image: {len(source):,} → {len(data):,} bytes ({mime_type}).")
+    return data, mime_type
 
-def post_media_update_to_linkedin():
-    """Posts an Image and Caption to LinkedIn with Alt Text."""
-    print("\n--- Starting LinkedIn Image/Caption Post (via GitHub with Alt Text) ---")
 
-    if not ACCESS_TOKEN_LI or not PERSON_URN:
-        print("🛑 LinkedIn credentials missing. Aborting media post.")
+def _prune_image_derivatives():
+    """Removes cached derivatives not touched for CONTENT_CACHE_DAYS."""
+    cutoff = time.time() - CONTENT_CACHE_DAYS * 24 * 3600
+    try:
+        names = os.listdir(IMAGE_DERIVATIVE_DIR)
+    except OSError:
         return
+    for name in names:
+        path = os.path.join(IMAGE_DERIVATIVE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
 
-    POST_TEXT = fetch_caption(LINKEDIN_CAPTION_URL)
-    if not POST_TEXT:
-        print("🛑 LinkedIn caption fetch failed. Aborting media post.")
-        return
 
-    ALT_TEXT = generate_alt_text(POST_TEXT)
-    print(f"✅ LinkedIn caption fetched from file.")
+class ContentBundle:
+    """
+    The day's images and captions, fetched once (in parallel) and shared by every platform.
+    Assets are mirrored to CONTENT_CACHE_DIR/<date> and revalidated with If-None-Match,
+    so repeated runs and retries mostly receive cheap 304 responses. Besides image.png, a
+    folder may hold image_2.png, image_3.png, ... for carousel / multi-image posts.
+    """
+
+    def __init__(self, date_folder):
+        self.date_folder = date_folder
+        self.base_url = content_base_url(date_folder)
+        self.cache_dir = os.path.join(CONTENT_CACHE_DIR, date_folder)
+        self.loaded_at = None
+        self.assets = dict(CONTENT_ASSETS)
+        self.image_keys = ["image"]
+        self._assets = {}
+        self._alt_texts = None
+        self._article = None
+        self._derivatives = {}
+        self._lock = threading.Lock()
+        # Separate from _lock, so generating the article never holds up images or Alt Text.
+        self._article_lock = threading.Lock()
+
+    def url_for(self, asset):
+        return f"{self.base_url}/{self.assets[asset]}"
+
+    @property
+    def image_url(self):
+        return self.url_for("image")
+
+    @property
+    def image(self):
+        """Raw bytes of the first image, or None if it could not be fetched."""
+        return self._assets.get("image")
+
+    @property
+    def complete(self):
+        """True once every CONTENT_ASSETS entry has been fetched (extra images are optional)."""
+        return all(self._assets.get(asset) for asset in CONTENT_ASSETS)
+
+    @property
+    def available_image_keys(self):
+        """Keys of the images that were fetched, in posting order."""
+        return [key for key in self.image_keys if self._assets.get(key)]
+
+    def image_urls(self, platform):
+        """Raw URLs of the available images, capped at the platform's limit."""
+        return [self.url_for(key) for key in self.available_image_keys[:PLATFORM_MAX_IMAGES[platform]]]
+
+    def images_for(self, platform):
+        """[(source bytes, bytes, mime_type)] of each available image prepared for the platform, capped at its limit."""
+        return [self._derivative(platform, key) for key in self.available_image_keys[:PLATFORM_MAX_IMAGES[platform]]]
+
+    def image_for(self, platform):
+        """(bytes, mime_type) of the first image prepared for the platform, or (None, None) if unavailable."""
+        if not self.image:
+            return None, None
+        _, data, mime_type = self._derivative(platform, "image")
+        return data, mime_type
+
+    def _derivative(self, platform, key):
+        source = self._assets[key]
+        derivative = self._derivatives.get((platform, key))
+        if derivative is None or derivative[0] is not source:
+            data, mime_type = get_image_derivative(source, platform)
+            derivative = self._derivatives[(platform, key)] = (source, data, mime_type)
+        record_run_stat(f"{platform}_{key}_bytes", f"{len(source):,} → {len(derivative[1]):,}")
+        return derivative
+
+    def caption(self, platform):
+        """Caption text for 'linkedin', 'instagram' or 'x', or None if unavailable."""
+        data = self._assets.get(f"caption_{platform}")
+        return data.decode("utf-8").strip() if data else None
+
+    def alt_text_captions(self):
+        """The ALT_TEXT_PLATFORMS captions that exist, keyed by platform."""
+        return {p: self.caption(p) for p in ALT_TEXT_PLATFORMS if self.caption(p)}
+
+    def alt_text(self, platform):
+        """
+        Alt Text for the platform's caption. The first call reads the prewarmed Alt Text for
+        these captions or, on a miss, generates Alt Text for every ALT_TEXT_PLATFORMS caption
+        in one batched Gemini request; later calls reuse it.
+        """
+        with self._lock:
+            if self._alt_texts is None:
+                captions = self.alt_text_captions()
+                self._alt_texts = PREPARED_CONTENT.read(self.date_folder, "alt_texts", captions)
+                if self._alt_texts is None:
+                    self._alt_texts = generate_alt_texts(captions)
+            alt_text = self._alt_texts.get(platform)
+        return alt_text or generate_alt_text(self.caption(platform) or "")
+
+    def article_text(self):
+        """
+        The date's LinkedIn article (see article_text_for), produced once per bundle: every
+        account in a run posts the same text instead of generating its own. Failures are retried.
+        """
+        with self._article_lock:
+            if self._article is None:
+                self._article = article_text_for(self.date_folder)
+            return self._article
+
+    def load(self):
+        """Fetches (or revalidates) every asset concurrently. Safe to call from several threads."""
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            etags = self._read_etags()
+            with stage_span("shared", "content_fetch"):
+                if CONTENT_MULTI_IMAGE:
+                    self._discover_images(etags)
+                # In context, so fetches honour the run deadline and their log records carry the run.
+                fetched = dict(zip(self.assets, map_in_context(
+                    lambda asset: self._fetch_asset(asset, etags.get(asset)), self.assets, len(self.assets), "content",
+                )))
+
+            for asset, (data, etag) in fetched.items():
+                self._assets[asset] = data
+                if etag:
+                    etags[asset] = etag
+                else:
+                    etags.pop(asset, None)
+            self._write_etags(etags)
+            self._alt_texts = None
+            self.loaded_at = time.monotonic()
+
+        available = [asset for asset in self.assets if self._assets.get(asset)]
+        log.info(f"📦 Content bundle for {self.date_folder}: {len(available)}/{len(self.assets)} assets available "
+                 f"({len(self.available_image_keys)} image(s)).")
+        return self
+
+    def _discover_images(self, etags):
+        """
+        Lists the folder (conditionally, falling back to the last listing) and registers every
+        image_N.png as an extra image asset. Only image.png is used if the listing is unavailable.
+        """
+        url = f"{GITHUB_API_BASE_URL}/repos/{REPO_OWNER}/{REPO_NAME}/contents/{CONTENT_BASE_PATH}/{self.date_folder}"
+        listing_path = os.path.join(self.cache_dir, "listing.json")
+        headers = {"Accept": "application/vnd.github+json"}
+        if GITHUB_TOKEN:
+            headers["Authorization"] = f"Bearer {GITHUB_TOKEN}"
+        names = None
+        try:
+            if etags.get("_listing") and os.path.exists(listing_path):
+                headers["If-None-Match"] = etags["_listing"]
+            response = http_request("GET", url, params={"ref": BRANCH}, headers=headers)
+            if response.status_code == 200:
+                names = [entry.get("name", "") for entry in response.json() if entry.get("type") == "file"]
+                _atomic_write(listing_path, json.dumps(names).encode("utf-8"))
+                etags["_listing"] = response.headers.get("ETag")
+            elif response.status_code != 304:
+                log.warning(f"⚠️ Could not list {self.date_folder} (HTTP {response.status_code}); using image.png only.")
+        except requests.exceptions.RequestException as e:
+            log.warning(f"⚠️ Could not list {self.date_folder} ({e}); using the last known image list.")
+        if names is None:
+            try:
+                with open(listing_path) as f:
+                    names = json.load(f)
+            except (OSError, ValueError):
+                names = []
+
+        numbered = []
+        for name in names:
+            match = CONTENT_IMAGE_PATTERN.fullmatch(name)
+            if match and match.group(1):
+                numbered.append((int(match.group(1)), name))
+        numbered.sort()
+        self.assets = dict(CONTENT_ASSETS)
+        self.image_keys = ["image"]
+        for number, name in numbered:
+            self.assets[f"image_{number}"] = name
+            self.image_keys.append(f"image_{number}")
+
+    def _fetch_asset(self, asset, etag):
+        """Returns (bytes or None, etag or None), preferring the on-disk copy when unchanged."""
+        url = self.url_for(asset)
+        cache_path = os.path.join(self.cache_dir, self.assets[asset])
+        cached = None
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                cached = f.read()
+
+        headers = {"If-None-Match": etag} if etag and cached is not None else {}
+        try:
+            response = http_request("GET", url, headers=headers)
+            if response.status_code == 304:
+                return cached, etag
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                log.error(f"🛑 Error: Could not find content at {url}. (HTTP Status 404)")
+                log.error("Ensure the folder and file names are correct for the current date.")
+                return None, None
+            # Rate limits and server errors are transient: keep serving the last good copy.
+            if cached is not None:
+                log.warning(f"⚠️ GitHub returned HTTP {e.response.status_code} for {url}; using cached copy.")
+                return cached, etag
+            log.error(f"🛑 GitHub returned HTTP {e.response.status_code} for {url}; content unavailable this time.")
+            return None, None
+        except requests.exceptions.RequestException as e:
+            if cached is not None:
+                log.warning(f"⚠️ Network error fetching {url}; using cached copy. Error: {e}")
+                return cached, etag
+            log.error(f"🛑 Network Error fetching content from {url}: {e}")
+            return None, None
+
+        _atomic_write(cache_path, response.content)
+        return response.content, response.headers.get("ETag")
+
+    def _read_etags(self):
+        try:
+            with open(os.path.join(self.cache_dir, "etags.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_etags(self, etags):
+        _atomic_write(os.path.join(self.cache_dir, "etags.json"), json.dumps(etags).encode("utf-8"))
+
+
+_content_bundles = {}
+_content_bundles_lock = threading.Lock()
+# Date -> number of runs currently posting it.
+_active_content_dates = {}
+
+
+def get_content_bundle(date_folder=None):
+    """
+    Returns the shared ContentBundle for a date, loading it on first use and
+    revalidating it once it is older than CONTENT_REVALIDATE_SECONDS. A bundle with missing
+    assets is always revalidated, so one failed fetch is not remembered for the whole window.
+    """
+    date_folder = date_folder or current_content_date()
+    with _content_bundles_lock:
+        bundle = _content_bundles.get(date_folder)
+        if bundle is None:
+            _prune_content_cache(keep={date_folder, *_active_content_dates})
+            bundle = _content_bundles[date_folder] = ContentBundle(date_folder)
+
+    if (bundle.loaded_at is None or not bundle.complete
+            or time.monotonic() - bundle.loaded_at > CONTENT_REVALIDATE_SECONDS):
+        bundle.load()
+    return bundle
+
+
+@contextmanager
+def content_date_in_use(date_folder):
+    """Marks a date as being posted so cache pruning leaves it alone (e.g. during a backfill)."""
+    with _content_bundles_lock:
+        _active_content_dates[date_folder] = _active_content_dates.get(date_folder, 0) + 1
+    try:
+        yield
+    finally:
+        with _content_bundles_lock:
+            _active_content_dates[date_folder] -= 1
+            if not _active_content_dates[date_folder]:
+                del _active_content_dates[date_folder]
 
-    headers = {
-        "Authorization": f"Bearer {ACCESS_TOKEN_LI}",
-        "Content-Type": "application/json"
-    }
 
+def _prune_content_cache(keep=()):
+    """Removes cached content folders older than CONTENT_CACHE_DAYS, except dates in `keep`."""
+    cutoff = (datetime.date.today() - datetime.timedelta(days=CONTENT_CACHE_DAYS)).strftime("%Y-%m-%d")
     try:
-        # Step 1: Register Asset
-        register_url = "https://api.linkedin.com/v2/assets?action=registerUpload"
+        folders = os.listdir(CONTENT_CACHE_DIR)
+    except OSError:
+        return
+    for folder in folders:
+        if len(folder) == 10 and folder < cutoff and folder not in keep:
+            shutil.rmtree(os.path.join(CONTENT_CACHE_DIR, folder), ignore_errors=True)
+            _content_bundles.pop(folder, None)
+    _prune_image_derivatives()
+
+# --- Step Journal (resumable multi-step flows) ---
+
+class StepJournal:
+    """
+    Records completed steps of a posting flow, and their outputs (asset URN, container id,
+    media id, ...), keyed by (date, platform, step) in the shared state database. A re-run of
+    the same flow reads the journal and resumes at the first step that has no entry.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self):
+        conn = connect_state_db(self.path)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS steps ("
+                " date TEXT NOT NULL,"
+                " platform TEXT NOT NULL,"
+                " step TEXT NOT NULL,"
+                " output TEXT NOT NULL,"
+                " recorded_at REAL NOT NULL,"
+                " PRIMARY KEY (date, platform, step))"
+            )
+            self._initialized = True
+        return conn
+
+    def flow(self, date, platform):
+        return FlowJournal(self, date, platform)
+
+    def get(self, date, platform, step):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT output FROM steps WHERE date = ? AND platform = ? AND step = ?",
+                (date, platform, step),
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row["output"]) if row else None
+
+    def record(self, date, platform, step, output):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO steps (date, platform, step, output, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (date, platform, step, json.dumps(output), time.time()),
+            )
+        finally:
+            conn.close()
+
+    def forget(self, date, platform, steps=None):
+        """Drops the given steps (or the whole flow) so they run again."""
+        conn = self._connect()
+        try:
+            if steps is None:
+                conn.execute("DELETE FROM steps WHERE date = ? AND platform = ?", (date, platform))
+            else:
+                conn.executemany(
+                    "DELETE FROM steps WHERE date = ? AND platform = ? AND step = ?",
+                    [(date, platform, step) for step in steps],
+                )
+        finally:
+            conn.close()
+
+
+class FlowJournal:
+    """StepJournal view bound to one (date, platform) flow."""
+
+    def __init__(self, journal, date, platform):
+        self.journal = journal
+        self.date = date
+        self.platform = platform
+
+    def get(self, step):
+        return self.journal.get(self.date, self.platform, step)
+
+    def record(self, step, output=None):
+        output = output or {}
+        self.journal.record(self.date, self.platform, step, output)
+        return output
+
+    def forget(self, *steps):
+        self.journal.forget(self.date, self.platform, list(steps) or None)
+
+
+STEP_JOURNAL = StepJournal(JOB_DB_PATH)
+
+
+# --- Prepared Content (prewarmed article & Alt Text) ---
+
+class PreparedContentStore:
+    """
+    Validated Gemini output generated ahead of the posting window, keyed by (date, kind) in
+    the shared state database. Each entry carries a fingerprint of its inputs (prompt, captions),
+    so content prepared from captions or prompts that have since changed is never served.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self):
+        conn = connect_state_db(self.path)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prepared_content ("
+                " date TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " prepared_at REAL NOT NULL,"
+                " PRIMARY KEY (date, kind))"
+            )
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def fingerprint(inputs):
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def get(self, date, kind, inputs):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT content FROM prepared_content WHERE date = ? AND kind = ? AND fingerprint = ?",
+                (date, kind, self.fingerprint(inputs)),
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row["content"]) if row else None
+
+    def put(self, date, kind, inputs, content):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO prepared_content (date, kind, fingerprint, content, prepared_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (date, kind, self.fingerprint(inputs), json.dumps(content), time.time()),
+            )
+        finally:
+            conn.close()
+
+    def read(self, date, kind, inputs):
+        """Posting-time lookup: the prepared content or None, counted in PREPARED_CONTENT_LOOKUPS."""
+        try:
+            content = self.get(date, kind, inputs)
+        except sqlite3.Error as e:
+            log.warning(f"⚠️ Could not read prewarmed {kind} for {date}: {e}")
+            content = None
+        PREPARED_CONTENT_LOOKUPS.labels(kind, "hit" if content is not None else "miss").inc()
+        if content is not None:
+            log.info(f"♻️ Using prewarmed {kind} for {date}.")
+        record_run_stat(f"{kind}_source", "prewarmed" if content is not None else "live")
+        return content
+
+
+PREPARED_CONTENT = PreparedContentStore(JOB_DB_PATH)
+
+
+def _article_inputs(date_folder):
+    return [GEMINI_MODEL, ARTICLE_SYSTEM_INSTRUCTION, article_prompt(date_folder)]
+
+
+def article_text_for(date_folder):
+    """The day's LinkedIn article: prewarmed if available, otherwise generated live."""
+    article = PREPARED_CONTENT.read(date_folder, "article", _article_inputs(date_folder))
+    return article if article is not None else generate_gemini_article_text(date_folder)
+
+
+def prepare_content(date_folder=None):
+    """
+    Prewarm stage: generates, validates and stores the day's article and Alt Text so the
+    posting run only reads them. Already-prepared items are skipped; an invalid article is
+    regenerated up to PREWARM_ATTEMPTS times and never stored. Returns {kind: status}.
+    """
+    date_folder = date_folder or current_content_date()
+    log.info(f"🔥 Prewarming Gemini content for {date_folder}...")
+    status = {}
+
+    inputs = _article_inputs(date_folder)
+    if PREPARED_CONTENT.get(date_folder, "article", inputs) is not None:
+        status["article"] = "already prepared"
+    else:
+        article = generate_gemini_article_text(date_folder, attempts=PREWARM_ATTEMPTS)
+        if article:
+            PREPARED_CONTENT.put(date_folder, "article", inputs, article)
+        status["article"] = "prepared" if article else "failed"
+
+    with content_date_in_use(date_folder):
+        captions = get_content_bundle(date_folder).alt_text_captions()
+    if not captions:
+        status["alt_texts"] = "no captions"
+    elif PREPARED_CONTENT.get(date_folder, "alt_texts", captions) is not None:
+        status["alt_texts"] = "already prepared"
+    else:
+        alt_texts = generate_alt_texts(captions)
+        defaults = (ALT_TEXT_DEFAULT_NO_KEY, ALT_TEXT_DEFAULT_ON_ERROR)
+        if all(alt_texts.get(key) not in defaults for key in captions):
+            PREPARED_CONTENT.put(date_folder, "alt_texts", captions, alt_texts)
+            status["alt_texts"] = "prepared"
+        else:
+            status["alt_texts"] = "failed"
+
+    log.info(f"🔥 Prewarm for {date_folder}: {status}")
+    return status
+
+
+# ==============================================================================
+# 4. LINKEDIN POSTING FUNCTIONS
+# ==============================================================================
+
+def _linkedin_step(step, index):
+    """Journal step name for the index-th image; the first image keeps the original names."""
+    return step if index == 0 else f"{step}_{index + 1}"
+
+
+def upload_image_to_linkedin(journal, index, source, image_data, headers):
+    """
+    Registers and uploads one image (resuming either step from the journal when the same
+    source image was handled within LINKEDIN_UPLOAD_REUSE_SECONDS) and returns its asset URN.
+    A 4xx from the upload drops both steps, so the next attempt registers a fresh asset.
+    """
+    register_step, upload_step = _linkedin_step("register", index), _linkedin_step("upload", index)
+
+    # Step 1: Register Asset (resumed from the journal when the same image was registered before)
+    image_hash = hashlib.sha256(source).hexdigest()
+    registered = journal.get(register_step)
+    if registered and registered.get("image_sha256") != image_hash:
+        log.info(f"Image {index + 1} changed since the last attempt. Restarting its upload flow.")
+        journal.forget(register_step, upload_step)
+        registered = None
+    elif registered and time.time() - registered.get("registered_at", 0) > LINKEDIN_UPLOAD_REUSE_SECONDS:
+        log.info(f"Journaled upload for image {index + 1} is too old to reuse. Registering it again.")
+        journal.forget(register_step, upload_step)
+        registered = None
+
+    if registered:
+        asset_urn = registered["asset_urn"]
+        log.debug(f"⏭️ Step 1: Reusing registered upload for image {index + 1} from journal. Asset URN: {asset_urn}")
+    else:
+        register_url = f"{LINKEDIN_API_BASE_URL}/assets?action=registerUpload"
         register_body = {
             "registerUploadRequest": {
                 "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
-                "owner": PERSON_URN,
+                "owner": current_account()["PERSON_URN"],
                 "serviceRelationships": [
                     {"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}
                 ]
             }
         }
-        res = requests.post(register_url, json=register_body, headers=headers)
-        res.raise_for_status()
-        register_data = res.json()
+        # Re-registering only creates an unused asset, so this step is safe to retry.
+        with stage_span("linkedin_image", "register"):
+            res = http_request("POST", register_url, retry=True, json=register_body, headers=headers)
+            res.raise_for_status()
+            register_data = res.json()
 
         upload_url = register_data['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
         asset_urn = register_data['value']['asset']
-        print(f"✅ Step 1: Registered upload. Asset URN: {asset_urn}")
+        registered = journal.record(register_step, {
+            "asset_urn": asset_urn, "upload_url": upload_url, "image_sha256": image_hash,
+            "registered_at": time.time(),
+        })
+        log.debug(f"✅ Step 1: Registered upload for image {index + 1}. Asset URN: {asset_urn}")
+
+    # Step 2: Upload Image
+    if journal.get(upload_step):
+        log.debug(f"⏭️ Step 2: Image {index + 1} already uploaded (journal).")
+    else:
+        upload_headers = {"Authorization": f"Bearer {current_account()['ACCESS_TOKEN_LI']}",
+                          "Content-Type": "application/octet-stream"}
+        with stage_span("linkedin_image", "upload"):
+            res = http_request("PUT", registered["upload_url"], data=image_data, headers=upload_headers, timeout=(5, 120))
+            if 400 <= res.status_code < 500 and res.status_code != 429:
+                # Expired or rejected upload URL: retrying it can never succeed.
+                journal.forget(register_step, upload_step)
+            res.raise_for_status()
+        journal.record(upload_step, {"bytes": len(image_data)})
+        log.debug(f"✅ Step 2: Image {index + 1} uploaded successfully.")
+    return asset_urn
+
+
+def post_media_update_to_linkedin(bundle=None):
+    """
+    Posts the day's image(s) and caption to LinkedIn with Alt Text; several images become one
+    multi-image post, registered and uploaded in parallel. Returns True once the post exists.
+    """
+    log.info("--- Starting LinkedIn Image/Caption Post (via GitHub with Alt Text) ---")
 
-        # Step 2: Upload Image
-        print(f"     Fetching image from: {IMAGE_URL}")
-        image_data = requests.get(IMAGE_URL).content
+    account = current_account()
+    if not account["ACCESS_TOKEN_LI"] or not account["PERSON_URN"]:
+        log.error("🛑 LinkedIn credentials missing. Aborting media post.")
+        return False
 
-        upload_headers = {"Authorization": f"Bearer {ACCESS_TOKEN_LI}", "Content-Type": "application/octet-stream"}
-        res = requests.put(upload_url, data=image_data, headers=upload_headers)
-        res.raise_for_status()
-        print("✅ Step 2: Image uploaded successfully.")
+    bundle = bundle or get_content_bundle()
+    POST_TEXT = bundle.caption("linkedin")
+    if not POST_TEXT:
+        log.error("🛑 LinkedIn caption fetch failed. Aborting media post.")
+        return False
+    if not bundle.image:
+        log.error("🛑 LinkedIn image fetch failed. Aborting media post.")
+        return False
+
+    journal = STEP_JOURNAL.flow(bundle.date_folder, account_key("linkedin_image"))
+    if journal.get("post"):
+        log.info("✅ LinkedIn image post already published for this date (journal). Skipping.")
+        return True
+
+    ALT_TEXT = bundle.alt_text("linkedin")
+    log.debug("✅ LinkedIn caption fetched from file.")
+
+    headers = {
+        "Authorization": f"Bearer {account['ACCESS_TOKEN_LI']}",
+        "Content-Type": "application/json"
+    }
+
+    try:
+        # Steps 1-2 for every image, concurrently
+        images = bundle.images_for("linkedin")
+        if len(images) > 1:
+            log.info(f"Preparing a {len(images)}-image post.")
+        asset_urns = map_in_context(
+            lambda item: upload_image_to_linkedin(journal, item[0], item[1][0], item[1][1], headers),
+            enumerate(images), MULTI_IMAGE_PARALLELISM, "linkedin-upload",
+        )
 
         # Step 3: Post with Alt Text
-        post_url = "https://api.linkedin.com/v2/ugcPosts"
+        post_url = f"{LINKEDIN_API_BASE_URL}/ugcPosts"
         post_body = {
-            "author": PERSON_URN,
+            "author": account["PERSON_URN"],
             "lifecycleState": "PUBLISHED",
             "specificContent": {
                 "com.linkedin.ugc.ShareContent": {
@@ -230,43 +1866,53 @@ def post_media_update_to_linkedin():
                             "media": asset_urn,
                             "altText": ALT_TEXT
                         }
+                        for asset_urn in asset_urns
                     ]
                 }
             },
             "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
         }
-        res = requests.post(post_url, json=post_body, headers=headers)
-        res.raise_for_status()
-        print("🎉 Step 3: LinkedIn Image/Caption Post created successfully (with Alt Text)!")
+        with stage_span("linkedin_image", "post"):
+            res = http_request("POST", post_url, json=post_body, headers=headers)
+            if 400 <= res.status_code < 500 and res.status_code != 429:
+                # The assets were rejected (e.g. expired): upload every image again next time.
+                journal.forget(*(_linkedin_step(step, index) for index in range(len(images))
+                                 for step in ("register", "upload")))
+            res.raise_for_status()
+        journal.record("post", {"post_id": res.headers.get("x-restli-id")})
+        log.info(f"🎉 Step 3: LinkedIn Image/Caption Post created successfully with {len(asset_urns)} image(s) (with Alt Text)!")
+        return True
 
     except requests.exceptions.RequestException as e:
-        print(f"🛑 LinkedIn Media Post FAILED. Error: {e}")
+        log.error(f"🛑 LinkedIn Media Post FAILED. Error: {e}")
         if e.response is not None:
-            print(f"     Response Status: {e.response.status_code}, Details: {e.response.text[:200]}...")
+            log.error(f"Response Status: {e.response.status_code}, Details: {e.response.text[:200]}...")
+        return False
 
 
-def post_gemini_article_to_linkedin():
-    """Posts a text-only Article generated by the Gemini API."""
-    print("\n--- Starting LinkedIn Article Post (via Gemini API) ---")
+def post_gemini_article_to_linkedin(bundle=None):
+    """Posts a text-only Article generated by the Gemini API. Returns True on success."""
+    log.info("--- Starting LinkedIn Article Post (via Gemini API) ---")
 
-    if not ACCESS_TOKEN_LI or not PERSON_URN:
-        print("🛑 LinkedIn credentials missing. Aborting article post.")
-        return
+    account = current_account()
+    if not account["ACCESS_TOKEN_LI"] or not account["PERSON_URN"]:
+        log.error("🛑 LinkedIn credentials missing. Aborting article post.")
+        return False
 
-    ARTICLE_TEXT = generate_gemini_article_text()
+    ARTICLE_TEXT = bundle.article_text() if bundle else article_text_for(current_content_date())
     if not ARTICLE_TEXT:
-        print("🛑 Article content generation failed. Aborting article post.")
-        return
+        log.error("🛑 Article content generation failed. Aborting article post.")
+        return False
 
     headers = {
-        "Authorization": f"Bearer {ACCESS_TOKEN_LI}",
+        "Authorization": f"Bearer {account['ACCESS_TOKEN_LI']}",
         "Content-Type": "application/json"
     }
 
     try:
-        post_url = "https://api.linkedin.com/v2/ugcPosts"
+        post_url = f"{LINKEDIN_API_BASE_URL}/ugcPosts"
         post_body = {
-            "author": PERSON_URN,
+            "author": account["PERSON_URN"],
             "lifecycleState": "PUBLISHED",
             "specificContent": {
                 "com.linkedin.ugc.ShareContent": {
@@ -276,291 +1922,1323 @@ def post_gemini_article_to_linkedin():
             },
             "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
         }
-        res = requests.post(post_url, json=post_body, headers=headers)
-        res.raise_for_status()
-        print("🎉 LinkedIn Article Post (Gemini content) created successfully!")
+        with stage_span("linkedin_article", "post"):
+            res = http_request("POST", post_url, json=post_body, headers=headers)
+            res.raise_for_status()
+        log.info("🎉 LinkedIn Article Post (Gemini content) created successfully!")
+        return True
 
     except requests.exceptions.RequestException as e:
-        print(f"🛑 LinkedIn Article Post FAILED. Error: {e}")
+        log.error(f"🛑 LinkedIn Article Post FAILED. Error: {e}")
         if e.response is not None:
-            print(f"     Response Status: {e.response.status_code}, Details: {e.response.text[:200]}...")
+            log.error(f"Response Status: {e.response.status_code}, Details: {e.response.text[:200]}...")
+        return False
 
 # ==============================================================================
 # 5. X (TWITTER) POSTING FUNCTION - FILE-BASED WITH IMAGE
 # ==============================================================================
 
-def post_tweet_from_file():
+# Per account name: (client, upload auth) pairs, cached profiles and in-flight profile refreshes.
+_x_clients = {}
+_x_clients_lock = threading.Lock()
+_x_profiles = {}
+_x_profile_refreshing = set()
+
+
+def get_x_clients(account=None):
     """
-    Fetches text from caption_x.txt and image from image.png (GitHub), 
-    then uploads both to X (Twitter) with improved error handling.
+    Returns the account's (v2 tweepy.Client, OAuth1 signer for media upload) pair,
+    building them on first use. Defaults to the current account.
     """
-    print("\n--- Starting X (Twitter) Post from File (with Image) ---")
+    account = account or current_account()
+    with _x_clients_lock:
+        if account["name"] not in _x_clients:
+            import tweepy
+
+            client = tweepy.Client(
+                consumer_key=account["CONSUMER_KEY"],
+                consumer_secret=account["CONSUMER_SECRET"],
+                access_token=account["X_ACCESS_TOKEN"],
+                access_token_secret=account["X_ACCESS_SECRET"],
+                wait_on_rate_limit=False
+            )
+            upload_auth = tweepy.OAuth1UserHandler(
+                account["CONSUMER_KEY"],
+                account["CONSUMER_SECRET"],
+                account["X_ACCESS_TOKEN"],
+                account["X_ACCESS_SECRET"]
+            ).apply_auth()
+            # Feed every X response's rate-limit headers into the scheduler, and bound every call.
+            client.session.hooks["response"].append(observe_rate_limit_response)
+            adapter = DeadlineTimeoutAdapter(X_API_TIMEOUT)
+            client.session.mount("https://", adapter)
+            client.session.mount("http://", adapter)
+            _x_clients[account["name"]] = (client, upload_auth)
+        return _x_clients[account["name"]]
+
+
+def x_profile_cache_path(account):
+    """On-disk profile cache; the default account keeps the original file name."""
+    if account["name"] == DEFAULT_ACCOUNT_NAME:
+        return X_PROFILE_CACHE_PATH
+    return os.path.join(STATE_DIR, f"x_profile_{account['name']}.json")
+
+
+def get_cached_x_handle():
+    """The current account's @handle if cached within X_PROFILE_TTL_SECONDS (memory, then disk), else None."""
+    account = current_account()
+    profile = _x_profiles.get(account["name"])
+    if profile is None:
+        try:
+            with open(x_profile_cache_path(account)) as f:
+                profile = _x_profiles[account["name"]] = json.load(f)
+        except (OSError, ValueError):
+            return None
+    if time.time() - profile.get("fetched_at", 0) > X_PROFILE_TTL_SECONDS:
+        return None
+    return profile.get("username")
+
+
+def refresh_x_handle_in_background():
+    """Fetches the current account's profile with get_me() off the posting path (one refresh per account at a time)."""
+    account = current_account()
+    with _x_clients_lock:
+        if account["name"] in _x_profile_refreshing:
+            return
+        _x_profile_refreshing.add(account["name"])
+
+    def refresh():
+        try:
+            client, _ = get_x_clients(account)
+            profile = {"username": client.get_me().data['username'], "fetched_at": time.time()}
+            path = x_profile_cache_path(account)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, json.dumps(profile).encode("utf-8"))
+            _x_profiles[account["name"]] = profile
+            log.info(f"✅ X account profile refreshed: @{profile['username']}.")
+        except Exception as e:
+            log.warning(f"⚠️ Could not refresh X account profile: {e}")
+        finally:
+            with _x_clients_lock:
+                _x_profile_refreshing.discard(account["name"])
+
+    # A plain thread does not inherit context variables; run it in a copy so the account follows it.
+    threading.Thread(target=contextvars.copy_context().run, args=(refresh,), name="x-profile", daemon=True).start()
+
+
+def create_tweet_with_rate_limit(client, **kwargs):
+    """create_tweet that waits for X quota first and, on a 429, defers once until the window resets."""
+    import tweepy
+
+    endpoint, quota = "POST /2/tweets", account_key("x")
+    for attempt in (1, 2):
+        RATE_LIMITER.acquire(quota, endpoint)
+        try:
+            return client.create_tweet(**kwargs)
+        except (tweepy.TwitterServerError, requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            note_platform_fault("x")
+            raise
+        except tweepy.TooManyRequests as e:
+            retry_in = RATE_LIMITER.observe(quota, endpoint, e.response)
+            if attempt == 2 or retry_in > RATE_LIMIT_MAX_DEFER_SECONDS:
+                raise
+            log.warning(f"⏳ X returned 429 for {endpoint}; deferring until reset ({retry_in:.0f}s).")
+
+
+def upload_media_to_x(data, mime_type, auth):
+    """
+    Uploads media with X's chunked INIT/APPEND/FINALIZE flow and returns the media id string.
+    Chunks are memoryview slices of one shared buffer, APPENDs run X_UPLOAD_PARALLELISM at a
+    time, and each chunk is retried on its own (http_request retries) instead of the whole upload.
+    """
+    view = memoryview(data)
+    init = http_request("POST", X_MEDIA_UPLOAD_URL, retry=True, auth=auth, data={
+        "command": "INIT",
+        "total_bytes": len(view),
+        "media_type": mime_type,
+        "media_category": "tweet_image",
+    })
+    init.raise_for_status()
+    media_id = init.json()["media_id_string"]
+
+    def append(segment_index):
+        start = segment_index * X_UPLOAD_CHUNK_SIZE
+        res = http_request(
+            "POST", X_MEDIA_UPLOAD_URL, retry=True, auth=auth,
+            data={"command": "APPEND", "media_id": media_id, "segment_index": segment_index},
+            files={"media": view[start:start + X_UPLOAD_CHUNK_SIZE]},
+        )
+        res.raise_for_status()
+
+    segments = range((len(view) + X_UPLOAD_CHUNK_SIZE - 1) // X_UPLOAD_CHUNK_SIZE)
+    # In context, so the chunks count against this account's quota and the run deadline.
+    map_in_context(append, segments, X_UPLOAD_PARALLELISM, "x-upload")
+    log.debug(f"Uploaded {len(segments)} chunk(s) of up to {X_UPLOAD_CHUNK_SIZE:,} bytes.")
+
+    res = http_request("POST", X_MEDIA_UPLOAD_URL, retry=True, auth=auth,
+                       data={"command": "FINALIZE", "media_id": media_id})
+    res.raise_for_status()
+    processing = res.json().get("processing_info")
+
+    # Images are usually ready immediately; otherwise poll STATUS as X advises.
+    deadline = time.monotonic() + X_UPLOAD_STATUS_DEADLINE_SECONDS
+    while processing and processing.get("state") in ("pending", "in_progress"):
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"X media {media_id} still processing after {X_UPLOAD_STATUS_DEADLINE_SECONDS:.0f}s")
+        sleep_within_deadline(max(1, processing.get("check_after_secs", 1)))
+        res = http_request("GET", X_MEDIA_UPLOAD_URL, auth=auth,
+                           params={"command": "STATUS", "media_id": media_id})
+        res.raise_for_status()
+        processing = res.json().get("processing_info")
+    if processing and processing.get("state") == "failed":
+        raise RuntimeError(f"X media processing failed: {processing.get('error')}")
+
+    return media_id
+
+
+def post_tweet_from_file(bundle=None):
+    """
+    Fetches text from caption_x.txt and the day's image(s) (GitHub), then uploads up to
+    four images in parallel and posts them to X (Twitter) with improved error handling.
+    """
+    import tweepy
+
+    log.info("--- Starting X (Twitter) Post from File (with Image) ---")
 
     # 1. Fetch Tweet Text
-    TWEET_TEXT = fetch_caption(X_CAPTION_URL)
+    bundle = bundle or get_content_bundle()
+    TWEET_TEXT = bundle.caption("x")
     if not TWEET_TEXT:
-        print("🛑 X caption fetch failed. Aborting X post.")
+        log.error("🛑 X caption fetch failed. Aborting X post.")
         return False
 
-    print(f"✅ Tweet text fetched: {TWEET_TEXT[:50]}...")
+    log.debug(f"✅ Tweet text fetched: {TWEET_TEXT[:50]}...")
 
-    # 2. Download Image
-    print(f"     Fetching image from: {IMAGE_URL}")
-    try:
-        image_response = requests.get(IMAGE_URL, timeout=30)
-        image_response.raise_for_status()
-        image_bytes = image_response.content
-        print("✅ Image downloaded successfully.")
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error downloading image for X: {e}. Posting text-only.")
-        image_bytes = None
+    journal = STEP_JOURNAL.flow(bundle.date_folder, account_key("x"))
+    posted = journal.get("tweet")
+    if posted:
+        log.info(f"✅ Tweet already posted for this date (journal, ID {posted['tweet_id']}). Skipping.")
+        return True
+
+    # 2. Images (shared content bundle, resized/re-encoded for X)
+    images = bundle.images_for("x")
+    if images:
+        log.debug(f"✅ {len(images)} image(s) loaded from content bundle.")
+    else:
+        log.error("❌ Image unavailable for X. Posting text-only.")
 
     # 3. Authenticate and Post
-    if not all([CONSUMER_KEY, CONSUMER_SECRET, X_ACCESS_TOKEN, X_ACCESS_SECRET]):
-        print("🛑 X API credentials missing. Aborting X post.")
+    account = current_account()
+    if not all(account[key] for key in ("CONSUMER_KEY", "CONSUMER_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_SECRET")):
+        log.error("🛑 X API credentials missing. Aborting X post.")
         return False
 
     try:
-        # Use v2 Client for posting the tweet
-        client = tweepy.Client(
-            consumer_key=CONSUMER_KEY,
-            consumer_secret=CONSUMER_SECRET,
-            access_token=X_ACCESS_TOKEN,
-            access_token_secret=X_ACCESS_SECRET,
-            wait_on_rate_limit=False
-        )
-        
-        # Use v1.1 API for media upload
-        api_v1 = tweepy.API(
-            tweepy.OAuth1UserHandler(
-                CONSUMER_KEY,
-                CONSUMER_SECRET,
-                X_ACCESS_TOKEN,
-                X_ACCESS_SECRET
-            ),
-            wait_on_rate_limit=False
-        )
-
-        user_handle = client.get_me().data['username']
-        print(f"✅ X API Authentication successful for user @{user_handle}.")
+        # v2 Client for posting the tweet + OAuth 1.0a signer for the chunked media upload
+        with stage_span("x", "auth"):
+            client, upload_auth = get_x_clients()
 
-        media_ids = []
-        if image_bytes:
-            print("⬆️ Uploading image to X...")
+        user_handle = get_cached_x_handle()
+        if user_handle:
+            log.info(f"✅ Using cached X account @{user_handle}.")
+        else:
+            refresh_x_handle_in_background()
+
+        def upload(item):
+            """Media id for the index-th image (reused from the journal when fresh), or None on failure."""
+            index, (_, image_bytes, image_mime_type) = item
+            step = "media_upload" if index == 0 else f"media_upload_{index + 1}"
+            uploaded = journal.get(step)
+            # X media ids expire 24h after upload; only reuse reasonably fresh ones.
+            if uploaded and time.time() - uploaded["uploaded_at"] < X_MEDIA_REUSE_SECONDS:
+                log.debug(f"⏭️ Reusing image {index + 1} uploaded earlier (journal). Media ID: {uploaded['media_id']}")
+                return uploaded["media_id"]
+            log.debug(f"⬆️ Uploading image {index + 1} to X...")
             try:
-                media_upload = api_v1.simple_upload(
-                    filename="github_image.png",
-                    file=io.BytesIO(image_bytes)
-                )
-                media_ids.append(media_upload.media_id_string)
-                print(f"✅ Image uploaded with media ID: {media_upload.media_id_string}")
-            except tweepy.TweepyException as upload_error:
-                if '429' in str(upload_error):
-                    print(f"❌ Rate limit on image upload. Trying text-only post...")
-                    media_ids = []
+                with stage_span("x", "upload"):
+                    media_id = upload_media_to_x(image_bytes, image_mime_type, upload_auth)
+                journal.record(step, {"media_id": media_id, "uploaded_at": time.time()})
+                log.debug(f"✅ Image {index + 1} uploaded with media ID: {media_id}")
+                return media_id
+            except requests.exceptions.RequestException as upload_error:
+                if upload_error.response is not None and upload_error.response.status_code == 429:
+                    log.error(f"❌ Rate limit on image {index + 1} upload. Leaving it out...")
                 else:
-                    print(f"❌ Error uploading image: {upload_error}")
-                    print("Proceeding with text-only tweet.")
-                    media_ids = []
+                    log.error(f"❌ Error uploading image {index + 1}: {upload_error}")
             except Exception as e:
-                print(f"❌ Unexpected error uploading image: {e}")
-                print("Proceeding with text-only tweet.")
-                media_ids = []
+                log.error(f"❌ Unexpected error uploading image {index + 1}: {e}")
+            return None
+
+        media_ids = [media_id for media_id in map_in_context(
+            upload, enumerate(images), MULTI_IMAGE_PARALLELISM, "x-media",
+        ) if media_id]
+        if images and not media_ids:
+            log.info("Proceeding with text-only tweet.")
 
         # Post the tweet with attached media
-        print("📤 Posting tweet to X...")
-        response = client.create_tweet(
-            text=TWEET_TEXT,
-            media_ids=media_ids if media_ids else None
-        )
+        log.debug("📤 Posting tweet to X...")
+        with stage_span("x", "tweet"):
+            response = create_tweet_with_rate_limit(
+                client,
+                text=TWEET_TEXT,
+                media_ids=media_ids if media_ids else None
+            )
 
         tweet_id = response.data['id']
-        tweet_url = f"https://x.com/{user_handle}/status/{tweet_id}"
-        print(f"🎉 Successfully posted tweet to X account @{user_handle}!")
-        print(f"Link: {tweet_url}")
+        journal.record("tweet", {"tweet_id": tweet_id})
+        if user_handle:
+            tweet_url = f"https://x.com/{user_handle}/status/{tweet_id}"
+            log.info(f"🎉 Successfully posted tweet to X account @{user_handle}!")
+        else:
+            tweet_url = f"https://x.com/i/web/status/{tweet_id}"
+            log.info("🎉 Successfully posted tweet to X!")
+        log.info(f"Link: {tweet_url}")
         return True
 
+    except RateLimitDeferred as e:
+        log.error(f"❌ X post deferred: {e}")
+        log.error(f">>> Quota resets in {e.wait_seconds / 60:.0f} minutes; re-trigger after that.")
+        return False
     except tweepy.TweepyException as e:
         error_str = str(e)
-        if '429' in error_str or 'Too Many Requests' in error_str:
-            print(f"❌ X Rate Limit Error (429): You've posted too many times recently.")
-            print(">>> X Rate Limits:")
-            print("    - Free/Basic: 50 tweets per 24 hours")
-            print("    - 300 tweets per 3 hours (user context)")
-            print(">>> Wait 15-60 minutes before retrying.")
-            print(">>> TIP: Run X posting separately or schedule posts with more time between them.")
+        if isinstance(e, tweepy.TooManyRequests):
+            log.error("❌ X Rate Limit Error (429): quota still exhausted after deferring to the reset time.")
+            log.error(f">>> Current X rate-limit state: {RATE_LIMITER.snapshot()}")
             return False
         elif '403' in error_str or 'Forbidden' in error_str:
-            print(f"❌ X Permission Error (403): {e}")
-            print(">>> Your X Developer App must have 'Read and Write' permissions.")
-            print(">>> Check: https://developer.x.com/en/portal/projects-and-apps")
+            log.error(f"❌ X Permission Error (403): {e}")
+            log.error(">>> Your X Developer App must have 'Read and Write' permissions.")
+            log.error(">>> Check: https://developer.x.com/en/portal/projects-and-apps")
             return False
         elif '401' in error_str or 'Unauthorized' in error_str:
-            print(f"❌ X Authentication Error (401): Invalid credentials.")
-            print(">>> Verify your API keys and tokens are correct.")
+            log.error("❌ X Authentication Error (401): Invalid credentials.")
+            log.error(">>> Verify your API keys and tokens are correct.")
             return False
         else:
-            print(f"❌ X API Error: {e}")
+            log.error(f"❌ X API Error: {e}")
             return False
     except Exception as e:
-        print(f"❌ Unexpected error during X posting: {e}")
+        log.error(f"❌ Unexpected error during X posting: {e}", exc_info=True)
         return False
 
 # ==============================================================================
 # 6. INSTAGRAM POSTING FUNCTION
 # ==============================================================================
 
-def post_to_instagram():
-    """Handles the 2-step process to post an image and caption to Instagram with Alt Text and User Tags."""
-    print("\n--- Starting Instagram Post (with Alt Text & User Tags) ---")
+# --- User-Tag Validation ---
+
+class InstagramTagCache:
+    """Tag verdicts per username, with per-verdict TTLs, in the shared state database."""
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self):
+        conn = connect_state_db(self.path)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS instagram_tags ("
+                " username TEXT PRIMARY KEY,"
+                " valid INTEGER NOT NULL,"
+                " detail TEXT,"
+                " checked_at REAL NOT NULL)"
+            )
+            self._initialized = True
+        return conn
+
+    def get_many(self, usernames):
+        """{username: valid} for every username with an unexpired verdict."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT username, valid, checked_at FROM instagram_tags WHERE username IN ({','.join('?' * len(usernames))})",
+                list(usernames),
+            ).fetchall()
+        finally:
+            conn.close()
+        now = time.time()
+        verdicts = {}
+        for row in rows:
+            ttl = INSTAGRAM_TAG_VALID_TTL_SECONDS if row["valid"] else INSTAGRAM_TAG_INVALID_TTL_SECONDS
+            if now - row["checked_at"] <= ttl:
+                verdicts[row["username"]] = bool(row["valid"])
+        return verdicts
+
+    def record(self, username, valid, detail=None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO instagram_tags (username, valid, detail, checked_at) VALUES (?, ?, ?, ?)",
+                (username, int(valid), detail, time.time()),
+            )
+        finally:
+            conn.close()
+
+
+INSTAGRAM_TAG_CACHE = InstagramTagCache(JOB_DB_PATH)
+
+
+def check_instagram_username(username):
+    """
+    Looks the handle up through business discovery. Returns (valid, detail): True when it is
+    found, None when the answer is unknown and the tag should be kept (network error, rate limit,
+    5xx, or a handle business discovery cannot see, such as a personal account). Only container
+    creation rejects a handle for good; see record_instagram_tag_verdicts.
+    """
+    account = current_account()
+    url = f"{GRAPH_API_BASE_URL}/{account['INSTAGRAM_BUSINESS_ID']}"
+    params = {"fields": f"business_discovery.username({username}){{id,username}}",
+              "access_token": account["ACCESS_TOKEN_IG"]}
+    try:
+        res = http_request("GET", url, params=params)
+    except requests.exceptions.RequestException as e:
+        return None, str(e)
+    try:
+        body = res.json()
+    except ValueError:
+        body = {}
+    if res.ok and body.get("business_discovery", {}).get("id"):
+        return True, None
+    error = body.get("error") or {}
+    if res.status_code == 400 and error.get("code") in INSTAGRAM_UNDISCOVERABLE_USER_ERROR_CODES:
+        return None, f"not visible to business discovery: {error.get('message')}"
+    return None, f"HTTP {res.status_code}: {error.get('message') or res.text[:200]}"
+
+
+def validated_instagram_user_tags(tags=None):
+    """
+    Returns the user tags (default: the current account's) minus handles Instagram rejected when
+    they were last sent. Verdicts are cached in INSTAGRAM_TAG_CACHE, shared by every account; uncached handles
+    are checked concurrently, and handles that could not be checked are kept.
+    """
+    tags = current_account()["instagram_user_tags"] if tags is None else tags
+    if not INSTAGRAM_TAG_VALIDATION or not tags:
+        return list(tags)
+
+    usernames = [tag["username"] for tag in tags]
+    with stage_span("instagram", "tag_validation"):
+        try:
+            verdicts = INSTAGRAM_TAG_CACHE.get_many(usernames)
+        except sqlite3.Error as e:
+            log.warning(f"⚠️ Could not read the Instagram tag cache: {e}")
+            verdicts = {}
+        unchecked = [name for name in usernames if name not in verdicts]
+        if unchecked:
+            checks = map_in_context(check_instagram_username, unchecked, 4, "ig-tags")
+            for name, (valid, detail) in zip(unchecked, checks):
+                if valid is None:
+                    log.info(f"Could not confirm Instagram tag @{name} ({detail}); keeping it.")
+                    continue
+                verdicts[name] = valid
+                try:
+                    INSTAGRAM_TAG_CACHE.record(name, valid, detail)
+                except sqlite3.Error as e:
+                    log.warning(f"⚠️ Could not cache the Instagram tag check for @{name}: {e}")
+
+    dropped = [name for name in usernames if verdicts.get(name) is False]
+    if dropped:
+        log.warning(f"⚠️ Dropping {len(dropped)} invalid/private Instagram tag(s): {', '.join('@' + n for n in dropped)}")
+    return [tag for tag in tags if verdicts.get(tag["username"]) is not False]
+
+
+def wait_for_instagram_container(container_id, deadline_seconds=None):
+    """
+    Polls the container's status_code with exponential backoff and jitter until it is
+    FINISHED, reaches a terminal state (ERROR/EXPIRED) or the deadline passes.
+    Returns the last status seen, or "TIMEOUT".
+    """
+    with stage_span("instagram", "poll"):
+        return _poll_instagram_container(container_id, deadline_seconds)
+
+
+def _poll_instagram_container(container_id, deadline_seconds):
+    deadline = time.monotonic() + (deadline_seconds or IG_POLL_DEADLINE_SECONDS)
+    run_remaining = remaining_run_time()
+    if run_remaining is not None:
+        deadline = min(deadline, time.monotonic() + run_remaining)
+    status_url = f"{GRAPH_API_BASE_URL}/{container_id}"
+    params = {"fields": "status_code,status", "access_token": current_account()["ACCESS_TOKEN_IG"]}
+    delay = IG_POLL_INITIAL_DELAY
+    polls = 0
+
+    while True:
+        polls += 1
+        res = http_request("GET", status_url, params=params)
+        res.raise_for_status()
+        data = res.json()
+        status_code = data.get("status_code", "UNKNOWN")
+
+        if status_code in ("FINISHED", "PUBLISHED"):
+            log.info(f"✅ Media container ready ({status_code}) after {polls} status check(s).")
+            return status_code
+        if status_code in ("ERROR", "EXPIRED"):
+            log.error(f"🛑 Media container failed processing: {status_code} ({data.get('status', 'no details')}).")
+            return status_code
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            log.error(f"🛑 Media container still {status_code} after {polls} status check(s); giving up.")
+            return "TIMEOUT"
+
+        wait_time = min(random.uniform(delay / 2, delay), remaining)
+        log.debug(f"⏳ Media container {status_code}. Checking again in {wait_time:.1f}s...")
+        time.sleep(wait_time)
+        delay = min(delay * 2, IG_POLL_MAX_DELAY)
 
-    if not ACCESS_TOKEN_IG or not INSTAGRAM_BUSINESS_ID:
-        print("🛑 Instagram credentials missing. Aborting Instagram post.")
+
+def wait_for_instagram_containers(container_ids, deadline_seconds=None):
+    """Polls several containers together (one poller each, same deadline). Returns their statuses in order."""
+    return map_in_context(
+        lambda container_id: wait_for_instagram_container(container_id, deadline_seconds),
+        container_ids, MULTI_IMAGE_PARALLELISM, "ig-poll",
+    )
+
+
+def record_instagram_tag_verdicts(user_tags_json, valid, detail=None):
+    """
+    Caches what container creation said about the tags it was sent. A rejection does not name
+    the bad handle, so handles already confirmed valid keep their verdict.
+    """
+    if not INSTAGRAM_TAG_VALIDATION:
         return
+    usernames = [tag["username"] for tag in json.loads(user_tags_json)]
+    try:
+        if not valid:
+            confirmed = INSTAGRAM_TAG_CACHE.get_many(usernames)
+            usernames = [name for name in usernames if not confirmed.get(name)]
+        for name in usernames:
+            INSTAGRAM_TAG_CACHE.record(name, valid, detail)
+    except sqlite3.Error as e:
+        log.warning(f"⚠️ Could not cache the Instagram tag verdicts: {e}")
+
 
-    CAPTION_TEXT = fetch_caption(INSTAGRAM_CAPTION_URL)
+def create_instagram_container(params):
+    """
+    Creates one media container (single image, carousel item or carousel) and returns its id.
+    An unpublished container simply expires, so container creation is safe to retry.
+    """
+    media_url = f"{GRAPH_API_BASE_URL}/{current_account()['INSTAGRAM_BUSINESS_ID']}/media"
+    res = http_request("POST", media_url, retry=True, data=params)
+    if res.status_code == 400 and "user_tags" in params and "Invalid user id" in res.text:
+        # A handle is invalid or private: remember it, and post without tags rather than not at all.
+        log.warning("⚠️ Instagram rejected a user tag. Retrying the container without user tags.")
+        record_instagram_tag_verdicts(params["user_tags"], False, "rejected by container creation")
+        params = {key: value for key, value in params.items() if key != "user_tags"}
+        res = http_request("POST", media_url, retry=True, data=params)
+    elif res.ok and "user_tags" in params:
+        record_instagram_tag_verdicts(params["user_tags"], True)
+    res.raise_for_status()
+    container_id = res.json().get("id")
+    if not container_id:
+        raise requests.exceptions.RequestException(f"Container ID not found. Response: {res.json()}", response=res)
+    return container_id
+
+
+def create_instagram_carousel(journal, image_urls, caption, alt_text, user_tags):
+    """
+    Creates the carousel's child containers concurrently (or resumes them from the journal),
+    waits for all of them together and then creates the CAROUSEL container. Returns its id,
+    or None if a child failed processing (the children are then forgotten and rebuilt next run).
+    """
+    access_token = current_account()["ACCESS_TOKEN_IG"]
+    children = journal.get("children")
+    if children and children.get("image_urls") != image_urls:
+        log.info("Carousel images changed since the last attempt. Recreating its items.")
+        journal.forget("children")
+        children = None
+
+    if children:
+        child_ids = children["container_ids"]
+        log.debug(f"⏭️ Step 1a: Resuming {len(child_ids)} carousel items from journal.")
+    else:
+        def create_child(item):
+            index, image_url = item
+            params = {
+                "image_url": image_url,
+                "is_carousel_item": "true",
+                "access_token": access_token,
+                "alt_text": alt_text,
+            }
+            # Tag people once, on the first image, as a single-image post would.
+            if index == 0 and user_tags:
+                params["user_tags"] = json.dumps(user_tags)
+            return create_instagram_container(params)
+
+        log.debug(f"Creating {len(image_urls)} carousel items concurrently...")
+        with stage_span("instagram", "children"):
+            child_ids = map_in_context(create_child, enumerate(image_urls), MULTI_IMAGE_PARALLELISM, "ig-child")
+        journal.record("children", {"container_ids": child_ids, "image_urls": image_urls})
+        log.info(f"✅ Step 1a: {len(child_ids)} carousel items created.")
+
+    statuses = wait_for_instagram_containers(child_ids)
+    if any(status not in ("FINISHED", "PUBLISHED") for status in statuses):
+        log.error(f"🛑 Carousel items not ready ({', '.join(statuses)}).")
+        journal.forget("children")
+        return None
+
+    with stage_span("instagram", "container"):
+        return create_instagram_container({
+            "media_type": "CAROUSEL",
+            "children": ",".join(child_ids),
+            "caption": caption,
+            "access_token": access_token,
+        })
+
+
+def post_to_instagram(bundle=None):
+    """
+    Handles the 2-step process to post an image and caption to Instagram with Alt Text and User Tags.
+    Several images are posted as a carousel. Returns True once the post is published.
+    """
+    log.info("--- Starting Instagram Post (with Alt Text & User Tags) ---")
+
+    account = current_account()
+    if not account["ACCESS_TOKEN_IG"] or not account["INSTAGRAM_BUSINESS_ID"]:
+        log.error("🛑 Instagram credentials missing. Aborting Instagram post.")
+        return False
+
+    bundle = bundle or get_content_bundle()
+    CAPTION_TEXT = bundle.caption("instagram")
     if not CAPTION_TEXT:
-        print("🛑 Instagram caption fetch failed. Aborting post.")
-        return
+        log.error("🛑 Instagram caption fetch failed. Aborting post.")
+        return False
 
-    ALT_TEXT = generate_alt_text(CAPTION_TEXT)
+    journal = STEP_JOURNAL.flow(bundle.date_folder, account_key("instagram"))
+    published = journal.get("publish")
+    if published:
+        log.info(f"✅ Instagram post already published for this date (journal, ID {published['media_id']}). Skipping.")
+        return True
+
+    # Checked before anything is generated or uploaded, so a bad handle cannot sink the post.
+    user_tags = validated_instagram_user_tags()
+    ALT_TEXT = bundle.alt_text("instagram")
 
     try:
-        # Step 1: Create Media Container
-        media_url = f"https://graph.facebook.com/v17.0/{INSTAGRAM_BUSINESS_ID}/media"
-        user_tags_json = json.dumps(INSTAGRAM_USER_TAGS)
-
-        media_params = {
-            "image_url": IMAGE_URL,
-            "caption": CAPTION_TEXT,
-            "access_token": ACCESS_TOKEN_IG,
-            "alt_text": ALT_TEXT,
-            "user_tags": user_tags_json
-        }
+        # Step 1: Create Media Container (or resume the one created by an interrupted run)
+        started_at = time.monotonic()
+        container = journal.get("container")
+        if container:
+            media_container_id = container["container_id"]
+            log.debug(f"⏭️ Step 1: Resuming media container from journal. ID: {media_container_id}")
+            status_code = wait_for_instagram_container(media_container_id)
+            if status_code == "PUBLISHED":
+                # The previous run published it but was interrupted before journaling that.
+                journal.record("publish", {"media_id": None, "container_id": media_container_id})
+                log.info("🎉 Instagram container was already published by the interrupted run.")
+                return True
+            if status_code in ("ERROR", "EXPIRED"):
+                log.info("Journaled container is no longer usable. Creating a new one.")
+                journal.forget("container")
+                container = None
+
+        if not container:
+            image_urls = bundle.image_urls("instagram")
+            if len(image_urls) > 1:
+                media_container_id = create_instagram_carousel(journal, image_urls, CAPTION_TEXT, ALT_TEXT, user_tags)
+                if not media_container_id:
+                    return False
+            else:
+                media_params = {
+                    "image_url": bundle.image_url,
+                    "caption": CAPTION_TEXT,
+                    "access_token": account["ACCESS_TOKEN_IG"],
+                    "alt_text": ALT_TEXT,
+                }
+                if user_tags:
+                    media_params["user_tags"] = json.dumps(user_tags)
 
-        print(f"     Creating media container with image URL: {IMAGE_URL}")
-        print(f"     Including {len(INSTAGRAM_USER_TAGS)} user tags for image.")
-        res = requests.post(media_url, data=media_params)
-        res.raise_for_status()
-        media_container_id = res.json().get("id")
+                log.debug(f"Creating media container with image URL: {bundle.image_url}")
+                log.debug(f"Including {len(user_tags)} user tags for image.")
+                with stage_span("instagram", "container"):
+                    media_container_id = create_instagram_container(media_params)
 
-        if not media_container_id:
-            print(f"🛑 Error: Container ID not found. Response: {res.json()}")
-            return
+            journal.record("container", {"container_id": media_container_id})
+            log.info(f"✅ Step 1: Media container created (with Alt Text and User Tags). ID: {media_container_id}")
 
-        print(f"✅ Step 1: Media container created (with Alt Text and User Tags). ID: {media_container_id}")
+            # CRITICAL: Wait for Instagram to process the media (poll instead of a fixed sleep)
+            status_code = wait_for_instagram_container(media_container_id)
 
-        # CRITICAL: Wait for Instagram to process the media
-        print("⏳ Waiting 15 seconds for Instagram to process the media container...")
-        time.sleep(15)
+        ready_seconds = time.monotonic() - started_at
+        record_run_stat("instagram_container_ready_s", round(ready_seconds, 1))
+        if status_code not in ("FINISHED", "PUBLISHED"):
+            log.error(f"🛑 Instagram media container not publishable ({status_code}). Aborting post.")
+            return False
 
-        # Step 2: Publish the Media with retry logic
-        publish_url = f"https://graph.facebook.com/v17.0/{INSTAGRAM_BUSINESS_ID}/media_publish"
+        # Step 2: Publish the Media
+        publish_url = f"{GRAPH_API_BASE_URL}/{account['INSTAGRAM_BUSINESS_ID']}/media_publish"
         publish_params = {
             "creation_id": media_container_id,
-            "access_token": ACCESS_TOKEN_IG
+            "access_token": account["ACCESS_TOKEN_IG"]
         }
 
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
-            print(f"     Attempting to publish post (Attempt {attempt}/{max_retries})...")
-            res = requests.post(publish_url, data=publish_params)
-            
-            if res.status_code == 200:
-                print("🎉 Step 2: Instagram Post published successfully (with Alt Text and Tags)!")
-                return
-            elif res.status_code == 400 and "not ready" in res.text.lower():
-                if attempt < max_retries:
-                    wait_time = 10 * attempt
-                    print(f"⏳ Media still processing. Waiting {wait_time} more seconds...")
-                    time.sleep(wait_time)
-                else:
-                    res.raise_for_status()
-            else:
-                res.raise_for_status()
+        log.debug("Publishing post...")
+        with stage_span("instagram", "publish"):
+            res = http_request("POST", publish_url, data=publish_params)
+            res.raise_for_status()
+        journal.record("publish", {"media_id": res.json().get("id")})
+
+        publish_seconds = time.monotonic() - started_at
+        record_run_stat("instagram_publish_latency_s", round(publish_seconds, 1))
+        log.info("🎉 Step 2: Instagram Post published successfully (with Alt Text and Tags)!")
+        log.info(f"⏱️ Instagram publish latency: {publish_seconds:.1f}s (container ready after {ready_seconds:.1f}s).")
+        return True
 
     except requests.exceptions.RequestException as e:
-        print(f"🛑 Instagram Post FAILED. Error: {e}")
+        log.error(f"🛑 Instagram Post FAILED. Error: {e}")
         if e.response is not None:
-            print(f"     Response Status: {e.response.status_code}, Details: {e.response.text[:500]}...")
+            log.error(f"Response Status: {e.response.status_code}, Details: {e.response.text[:500]}...")
             if 'Invalid user id' in e.response.text:
-                print(">>> CRITICAL FIX: One or more Instagram usernames in INSTAGRAM_USER_TAGS are invalid/private. Remove/correct them.")
+                log.error(">>> One or more Instagram usernames in INSTAGRAM_USER_TAGS are invalid/private. Remove/correct them.")
             elif 'not ready' in e.response.text.lower():
-                print(">>> Instagram needs more time to process media. Consider increasing wait time.")
+                log.error(">>> Instagram needs more time to process media. Consider increasing IG_POLL_DEADLINE_SECONDS.")
+        return False
 
 # ==============================================================================
 # 7. MAIN AUTOMATION SEQUENCE (EXECUTED IN BACKGROUND THREAD)
 # ==============================================================================
 
-def run_automation_sequence():
-    """Executes the full, potentially long-running social media posting sequence."""
-    print("=" * 60)
-    print(f"🚀 Starting Unified Social Media Automation for: {TODAY_FOLDER}")
-    print("=" * 60)
+# Each job: (results key, report label, banner logged before it runs, posting function).
+# account_jobs() expands these per account.
+PLATFORM_JOBS = [
+    ("x", "X (Twitter)", "📱 X (TWITTER) POST", post_tweet_from_file),
+    ("linkedin_image", "LinkedIn Image", "💼 LINKEDIN POSTS", post_media_update_to_linkedin),
+    ("linkedin_article", "LinkedIn Article", None, post_gemini_article_to_linkedin),
+    ("instagram", "Instagram", "📸 INSTAGRAM POST", post_to_instagram),
+]
 
-    # Track success/failure for final report
-    results = {
-        "x": False,
-        "linkedin_image": False,
-        "linkedin_article": False,
-        "instagram": False
-    }
 
-    # --- X (Twitter) Post from File (PRIORITY: Post First) ---
-    print("\n📱 X (TWITTER) POST")
-    try:
-        post_tweet_from_file()
-        results["x"] = True
-    except Exception as e:
-        print(f"❌ X post encountered an error: {e}")
-        print("Continuing with other platforms...")
+def account_jobs(platforms=None):
+    """
+    PLATFORM_JOBS expanded for every account as (job key, label, banner, function, account);
+    keys and labels of non-default accounts name the account. `platforms` limits the result
+    to those (account-qualified) job keys.
+    """
+    jobs = []
+    for account in ACCOUNTS:
+        for key, label, banner, func in PLATFORM_JOBS:
+            if account["platforms"] is not None and key not in account["platforms"]:
+                continue
+            job_key = account_key(key, account)
+            if platforms is not None and job_key not in platforms:
+                continue
+            if account["name"] != DEFAULT_ACCOUNT_NAME:
+                label = f"{label} [{account['name']}]"
+                banner = banner and f"{banner} [{account['name']}]"
+            jobs.append((job_key, label, banner, func, account))
+    return jobs
 
-    # Add small delay between platforms
-    time.sleep(3)
 
-    print("\n" + "=" * 60)
+def job_platform(job_key):
+    """The PLATFORM_JOBS key behind an account-qualified job key ("x@acme" -> "x")."""
+    return job_key.partition("@")[0]
 
-    # --- LinkedIn Posts ---
-    print("\n💼 LINKEDIN POSTS")
-    
-    # Post 1: Image with Caption
-    try:
-        post_media_update_to_linkedin()
-        results["linkedin_image"] = True
-    except Exception as e:
-        print(f"❌ LinkedIn image post error: {e}")
 
-    time.sleep(3)
+# --- Job Registry (single-flight across gunicorn workers) ---
+
+class JobRegistry:
+    """
+    SQLite-backed record of posting jobs keyed by (date, platform).
+    Claims happen inside an IMMEDIATE transaction, so across every gunicorn worker at most one
+    run owns a given key; triggers that find a key in flight are coalesced into that run.
+    States: queued -> running -> succeeded | failed. Failed or expired jobs may be claimed again.
+    """
+
+    def __init__(self, path, lease_seconds):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._initialized = False
+
+    def _connect(self):
+        conn = connect_state_db(self.path)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " date TEXT NOT NULL,"
+                " platform TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " run_id TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (date, platform))"
+            )
+            self._initialized = True
+        return conn
+
+    def claim(self, date, platforms, run_id):
+        """
+        Claims each (date, platform) that is new, failed or whose lease expired.
+        Returns {"claimed": [...], "in_flight": {platform: run_id}, "done": [...]}.
+        """
+        now = time.time()
+        outcome = {"claimed": [], "in_flight": {}, "done": []}
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for platform in platforms:
+                row = conn.execute(
+                    "SELECT state, run_id, updated_at FROM jobs WHERE date = ? AND platform = ?",
+                    (date, platform),
+                ).fetchone()
+                if row is not None and row["state"] == "succeeded":
+                    outcome["done"].append(platform)
+                elif (row is not None and row["state"] in ("queued", "running")
+                      and now - row["updated_at"] < self.lease_seconds):
+                    outcome["in_flight"][platform] = row["run_id"]
+                else:
+                    conn.execute(
+                        "INSERT INTO jobs (date, platform, state, run_id, attempts, created_at, updated_at)"
+                        " VALUES (?, ?, 'queued', ?, 1, ?, ?)"
+                        " ON CONFLICT (date, platform) DO UPDATE SET"
+                        " state = 'queued', run_id = excluded.run_id,"
+                        " attempts = attempts + 1, updated_at = excluded.updated_at",
+                        (date, platform, run_id, now, now),
+                    )
+                    outcome["claimed"].append(platform)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return outcome
+
+    def mark(self, date, platform, state, run_id):
+        """Moves a job to `state`, but only while `run_id` still owns it."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE date = ? AND platform = ? AND run_id = ?",
+                (state, time.time(), date, platform, run_id),
+            )
+        finally:
+            conn.close()
+
+    def list(self, date=None, limit=100):
+        """Most recently updated jobs, optionally for a single date."""
+        conn = self._connect()
+        try:
+            query = "SELECT * FROM jobs"
+            params = []
+            if date:
+                query += " WHERE date = ?"
+                params.append(date)
+            query += " ORDER BY updated_at DESC LIMIT ?"
+            params.append(limit)
+            return [dict(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+
+JOB_REGISTRY = JobRegistry(JOB_DB_PATH, JOB_LEASE_SECONDS)
+
+
+# --- Circuit Breakers (per platform, shared across gunicorn workers) ---
+
+class CircuitBreakerStore:
+    """
+    SQLite-backed circuit breaker per platform API. After CIRCUIT_FAILURE_THRESHOLD consecutive
+    faulty runs the circuit opens and jobs are skipped until `opened_until`; then exactly one
+    run (across all workers) is let through as a half-open probe. A successful probe closes the
+    circuit; a failed one reopens it for twice as long, up to CIRCUIT_MAX_OPEN_SECONDS.
+    States: closed -> open -> half_open -> closed | open.
+    """
+
+    def __init__(self, path, threshold, open_seconds, max_open_seconds, probe_lease_seconds):
+        self.path = path
+        self.threshold = threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe_lease_seconds = probe_lease_seconds
+        self._initialized = False
+
+    def _connect(self):
+        conn = connect_state_db(self.path)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS circuits ("
+                " platform TEXT PRIMARY KEY,"
+                " state TEXT NOT NULL,"
+                " failures INTEGER NOT NULL DEFAULT 0,"
+                " open_seconds REAL NOT NULL DEFAULT 0,"
+                " opened_until REAL NOT NULL DEFAULT 0,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._initialized = True
+        return conn
+
+    def allow(self, platform):
+        """
+        Returns "closed" (run normally), "probe" (this caller owns the half-open trial) or "skip".
+        A probe that never reported back is superseded after the probe lease.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT state, opened_until, updated_at FROM circuits WHERE platform = ?",
+                               (platform,)).fetchone()
+            if row is None or row["state"] == "closed":
+                return "closed"
+            if row["state"] == "open" and now < row["opened_until"]:
+                return "skip"
+            if row["state"] == "half_open" and now - row["updated_at"] < self.probe_lease_seconds:
+                return "skip"
+            # Atomic hand-over: only the worker whose UPDATE matches the row it read gets the probe.
+            claimed = conn.execute(
+                "UPDATE circuits SET state = 'half_open', updated_at = ?"
+                " WHERE platform = ? AND state = ? AND updated_at = ?",
+                (now, platform, row["state"], row["updated_at"]),
+            ).rowcount
+            return "probe" if claimed else "skip"
+        finally:
+            conn.close()
+
+    def record_success(self, platform):
+        """Closes the circuit and resets its failure count."""
+        conn = self._connect()
+        try:
+            closed = conn.execute(
+                "UPDATE circuits SET state = 'closed', failures = 0, open_seconds = 0, opened_until = 0,"
+                " updated_at = ? WHERE platform = ? AND (state != 'closed' OR failures > 0)",
+                (time.time(), platform),
+            ).rowcount
+        finally:
+            conn.close()
+        if closed:
+            log.info(f"✅ Circuit for {platform} closed.")
+
+    def record_failure(self, platform, probe=False):
+        """Counts a faulty run; opens the circuit at the threshold, or reopens it after a failed probe."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT failures, open_seconds FROM circuits WHERE platform = ?",
+                               (platform,)).fetchone()
+            failures = (row["failures"] if row else 0) + 1
+            state, open_seconds, opened_until = "closed", row["open_seconds"] if row else 0, 0
+            if probe or failures >= self.threshold:
+                open_seconds = min(open_seconds * 2, self.max_open_seconds) if probe and open_seconds else self.open_seconds
+                state, opened_until = "open", now + open_seconds
+            conn.execute(
+                "INSERT INTO circuits (platform, state, failures, open_seconds, opened_until, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (platform) DO UPDATE SET state = excluded.state, failures = excluded.failures,"
+                " open_seconds = excluded.open_seconds, opened_until = excluded.opened_until,"
+                " updated_at = excluded.updated_at",
+                (platform, state, failures, open_seconds, opened_until, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if state == "open":
+            log.warning(f"⚡ Circuit for {platform} opened for {open_seconds:.0f}s after {failures} faulty run(s).")
+
+    def release_probe(self, platform):
+        """Returns a half-open probe without a verdict: the circuit stays open but can be probed again."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE circuits SET state = 'open', opened_until = 0, updated_at = ?"
+                " WHERE platform = ? AND state = 'half_open'",
+                (time.time(), platform),
+            )
+        finally:
+            conn.close()
+
+    def snapshot(self):
+        """Every circuit's persisted state."""
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute("SELECT * FROM circuits ORDER BY platform")]
+        finally:
+            conn.close()
+
+
+CIRCUIT_BREAKERS = CircuitBreakerStore(JOB_DB_PATH, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS,
+                                       CIRCUIT_MAX_OPEN_SECONDS, JOB_LEASE_SECONDS)
+
+_job_executor = None
+_job_executor_lock = threading.Lock()
+
+
+def get_job_executor():
+    """
+    Bounded pool that runs automation sequences in the background of this worker.
+    On gevent workers threading is monkey-patched, so its workers (and every nested
+    pool) are greenlets and waiting on the network never pins an OS thread.
+    """
+    global _job_executor
+    with _job_executor_lock:
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(max_workers=max(1, JOB_MAX_WORKERS), thread_name_prefix="automation")
+        return _job_executor
+
+
+def log_background_failure(description):
+    """
+    Done-callback for background futures whose result nobody reads: logs the exception, with
+    its traceback, instead of letting the executor swallow it.
+    """
+    def callback(future):
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            log.error(f"❌ {description} failed: {error}", exc_info=(type(error), error, error.__traceback__))
+    return callback
+
+
+def _claim_run(date_folder):
+    """Claims every platform job for the date; returns the claim outcome plus the run id (None if nothing was claimed)."""
+    run_id = uuid.uuid4().hex[:12]
+    outcome = JOB_REGISTRY.claim(date_folder, [job[0] for job in account_jobs()], run_id)
+    outcome["run_id"] = run_id if outcome["claimed"] else None
+    return outcome
+
+
+def start_automation_run(date_folder):
+    """
+    Claims every platform job for the date and, if anything was claimed, queues one
+    run for those platforms. Returns the claim outcome plus the run id.
+    """
+    outcome = _claim_run(date_folder)
+    if outcome["claimed"]:
+        future = get_job_executor().submit(run_automation_sequence, platforms=outcome["claimed"],
+                                           run_id=outcome["run_id"], date_folder=date_folder)
+        future.add_done_callback(log_background_failure(f"Automation run {outcome['run_id']} for {date_folder}"))
+    return outcome
+
+
+# --- Backfill (several content dates, bounded concurrency) ---
+
+_backfill_executor = None
+_backfill_executor_lock = threading.Lock()
+
+
+def get_backfill_executor():
+    """Separate bounded pool for backfills, so catching up never starves today's triggers."""
+    global _backfill_executor
+    with _backfill_executor_lock:
+        if _backfill_executor is None:
+            _backfill_executor = ThreadPoolExecutor(max_workers=max(1, BACKFILL_MAX_CONCURRENCY),
+                                                    thread_name_prefix="backfill")
+        return _backfill_executor
+
+
+def list_content_dates(start, end):
+    """Content folders (YYYY-MM-DD) between start and end inclusive, listed via the GitHub contents API."""
+    url = f"{GITHUB_API_BASE_URL}/repos/{REPO_OWNER}/{REPO_NAME}/contents/{CONTENT_BASE_PATH}"
+    headers = {"Accept": "application/vnd.github+json"}
+    if GITHUB_TOKEN:
+        headers["Authorization"] = f"Bearer {GITHUB_TOKEN}"
+    response = http_request("GET", url, params={"ref": BRANCH}, headers=headers)
+    response.raise_for_status()
+
+    dates = []
+    for entry in response.json():
+        name = entry.get("name", "")
+        if entry.get("type") != "dir" or not re.fullmatch(r"\d{4}-\d{2}-\d{2}", name):
+            continue
+        if start <= name <= end:
+            dates.append(name)
+    return sorted(dates)
+
+
+def _run_backfill_date(date_folder):
+    """Claims one date's jobs and posts them inline on a backfill worker. Returns the claim outcome."""
+    outcome = _claim_run(date_folder)
+    if outcome["claimed"]:
+        run_automation_sequence(platforms=outcome["claimed"], run_id=outcome["run_id"], date_folder=date_folder)
+    else:
+        log.info(f"♻️ Backfill: nothing new to run for {date_folder}.")
+    return outcome
+
+
+def start_backfill(start, end):
+    """
+    Queues every content folder from start to end (inclusive, YYYY-MM-DD) on the backfill pool.
+    Each date is claimed when its turn comes, so dates already posted or in flight are skipped.
+    Content bundles, image derivatives, Gemini results and HTTP sessions are shared across dates.
+    Returns {date: future}. Raises ValueError for an invalid range and RequestException if the
+    folder listing fails.
+    """
+    start, end = parse_content_date(start), parse_content_date(end)
+    if start > end:
+        raise ValueError(f"start {start} is after end {end}")
+    span_days = (datetime.date.fromisoformat(end) - datetime.date.fromisoformat(start)).days + 1
+    if span_days > BACKFILL_MAX_DAYS:
+        raise ValueError(f"range covers {span_days} days; the limit is BACKFILL_MAX_DAYS={BACKFILL_MAX_DAYS}")
+
+    dates = list_content_dates(start, end)
+    log.info(f"🗓️ Backfill {start} → {end}: {len(dates)} content folders, "
+             f"{BACKFILL_MAX_CONCURRENCY} at a time.")
+    pool = get_backfill_executor()
+    futures = {}
+    for date_folder in dates:
+        futures[date_folder] = pool.submit(_run_backfill_date, date_folder)
+        futures[date_folder].add_done_callback(log_background_failure(f"Backfill of {date_folder}"))
+    return futures
+
+
+def parse_platform_dependencies(spec, job_keys):
+    """
+    Parses "job:prerequisite" pairs into {job: {prerequisites}}.
+    Unknown job names and pairs that would create a cycle are ignored with a warning;
+    pairs naming a known platform that is not part of this run are skipped silently.
+    """
+    known = {job[0] for job in PLATFORM_JOBS} | set(job_keys)
+    dependencies = {key: set() for key in job_keys}
+    for pair in filter(None, (p.strip() for p in (spec or "").split(","))):
+        job, _, prerequisite = (part.strip() for part in pair.partition(":"))
+        if job not in known or prerequisite not in known or job == prerequisite:
+            log.warning(f"⚠️ Ignoring invalid platform dependency '{pair}'.")
+            continue
+        if job not in dependencies or prerequisite not in dependencies:
+            continue
+
+        # Reject the pair if the prerequisite already (transitively) waits on the job.
+        stack, seen = [prerequisite], set()
+        while stack:
+            current = stack.pop()
+            if current == job:
+                break
+            if current not in seen:
+                seen.add(current)
+                stack.extend(dependencies[current])
+        else:
+            dependencies[job].add(prerequisite)
+            continue
+        log.warning(f"⚠️ Ignoring platform dependency '{pair}': it would create a cycle.")
+
+    return dependencies
 
-    print("\n" + "=" * 60)
 
-    # Post 2: Gemini-generated Article
+def _run_platform_job(job, results, bundle, delay=0):
+    """
+    Runs one platform job, recording success in the shared results dict and the job registry.
+    Jobs whose platform circuit is open are skipped without calling the API; the outcome feeds
+    the circuit (a failure only counts when it involved transport errors or 5xx responses).
+    """
+    key, label, _, func, account = job
+    platform = job_platform(key)
+    run_id = _current_run_id.get()
+    circuit = JOB_CIRCUITS.get(platform, platform)
+    faults = set()
+    faults_token = _platform_faults.set(faults)
+    account_token = _current_account.set(account)
+    log_token = _log_context.set({**_log_context.get(), "platform": platform, "account": account["name"]})
+    outcome = "failure"
     try:
-        post_gemini_article_to_linkedin()
-        results["linkedin_article"] = True
-    except Exception as e:
-        print(f"❌ LinkedIn article post error: {e}")
+        if delay:
+            sleep_within_deadline(delay)
+        try:
+            admission = CIRCUIT_BREAKERS.allow(circuit)
+        except sqlite3.Error as e:
+            log.warning(f"⚠️ Could not read the {circuit} circuit ({e}); running {label} anyway.")
+            admission = "closed"
+        if admission == "skip":
+            outcome = "skipped"
+            log.warning(f"⚡ {label} skipped: the {circuit} circuit is open after repeated failures.")
+            return
+        if admission == "probe":
+            log.info(f"🩺 {label}: probing the {circuit} circuit (half-open).")
+        if run_id:
+            _mark_job(bundle.date_folder, key, "running", run_id)
+        try:
+            with stage_span(platform, "total") as span:
+                results[key] = bool(func(bundle=bundle))
+                if not results[key]:
+                    span["outcome"] = "failed"
+        except Exception as e:
+            if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                faults.add(circuit)
+            log.error(f"❌ {label} post encountered an error: {e}. Continuing with other platforms...", exc_info=True)
+        if results[key]:
+            outcome = "success"
+        try:
+            if results[key]:
+                CIRCUIT_BREAKERS.record_success(circuit)
+            elif circuit in faults:
+                CIRCUIT_BREAKERS.record_failure(circuit, probe=admission == "probe")
+            elif admission == "probe":
+                # Failed for a reason other than the API (content, 4xx): no verdict, let the next run probe.
+                CIRCUIT_BREAKERS.release_probe(circuit)
+        except sqlite3.Error as e:
+            log.warning(f"⚠️ Could not update the {circuit} circuit after {label}: {e}")
+    except RunDeadlineExceeded as e:
+        log.error(f"❌ {label} not started: {e}")
+    finally:
+        PLATFORM_RESULTS.labels(platform, outcome).inc()
+        if run_id:
+            _mark_job(bundle.date_folder, key, "succeeded" if results[key] else "failed", run_id)
+        _platform_faults.reset(faults_token)
+        _current_account.reset(account_token)
+        _log_context.reset(log_token)
+
+
+def _mark_job(date_folder, key, status, run_id):
+    """JOB_REGISTRY.mark that only warns on a state DB error, so one locked write never stops a job."""
+    try:
+        JOB_REGISTRY.mark(date_folder, key, status, run_id)
+    except sqlite3.Error as e:
+        log.warning(f"⚠️ Could not mark {key} as {status} for {date_folder}: {e}")
+
+
+def _run_jobs_sequentially(jobs, results, bundle):
+    """Original ordering: one platform at a time with a fixed gap between them."""
+    for index, job in enumerate(jobs):
+        if job[2]:
+            log.info(job[2])
+        try:
+            _run_platform_job(job, results, bundle, PLATFORM_SPACING_SECONDS if index else 0)
+        except Exception as e:
+            log.error(f"❌ {job[1]} job crashed: {e}. Continuing with other platforms...", exc_info=True)
+
+
+def _run_jobs_in_parallel(jobs, results, bundle, chained=False):
+    """
+    Runs the platform jobs on bounded pools. A job starts once all of its prerequisites (in its
+    own account) have finished (successfully or not), after PLATFORM_SPACING_SECONDS; `chained`
+    runs each account's jobs one after another (sequential mode with several accounts).
+    One account shares a single pool of PLATFORM_MAX_WORKERS; several accounts fan out through
+    one pool per platform API, ACCOUNT_PLATFORM_CONCURRENCY accounts at a time.
+    """
+    by_account = {}
+    for job in jobs:
+        by_account.setdefault(job[4]["name"], []).append(job)
+    dependencies = {}
+    for account_job_list in by_account.values():
+        account = account_job_list[0][4]
+        keys = [job[0] for job in account_job_list]
+        prerequisites = parse_platform_dependencies(PLATFORM_DEPENDENCIES, [job_platform(key) for key in keys])
+        for index, key in enumerate(keys):
+            dependencies[key] = {account_key(p, account) for p in prerequisites[job_platform(key)]}
+            if chained and index:
+                dependencies[key].add(keys[index - 1])
+    pending = {job[0]: job for job in jobs}
+    finished = set()
+    running = {}
+
+    fan_out = len(by_account) > 1
+    if fan_out:
+        log.info(f"⚡ Running {len(jobs)} platform jobs for {len(by_account)} accounts "
+                 f"(up to {ACCOUNT_PLATFORM_CONCURRENCY} accounts per platform at a time).")
+    else:
+        log.info(f"⚡ Running {len(jobs)} platform jobs in parallel (max {PLATFORM_MAX_WORKERS} workers).")
+    with ExitStack() as stack:
+        pools = {}
+
+        def pool_for(key):
+            name = JOB_CIRCUITS.get(job_platform(key), job_platform(key)) if fan_out else "platform"
+            if name not in pools:
+                size = ACCOUNT_PLATFORM_CONCURRENCY if fan_out else PLATFORM_MAX_WORKERS
+                pools[name] = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, size), thread_name_prefix=name))
+            return pools[name]
+
+        while pending or running:
+            for key in [k for k in pending if dependencies[k] <= finished]:
+                delay = PLATFORM_SPACING_SECONDS if dependencies[key] else 0
+                context = contextvars.copy_context()
+                job = pending.pop(key)
+                running[pool_for(key).submit(context.run, _run_platform_job, job, results, bundle, delay)] = key
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                finished.add(key)
+                error = future.exception()
+                if error is not None:
+                    log.error(f"❌ {key} job crashed: {error}. Continuing with other platforms...",
+                              exc_info=(type(error), error, error.__traceback__))
+
+
+def run_automation_sequence(platforms=None, run_id=None, date_folder=None):
+    """
+    Executes the full, potentially long-running social media posting sequence.
+    `platforms` limits the run to those job keys; `run_id` ties it to claimed registry jobs;
+    `date_folder` selects the content date (default: today, resolved now).
+    """
+    date_folder = date_folder or current_content_date()
+    with log_context(run_id=run_id, date=date_folder):
+        _run_automation_sequence(platforms, run_id, date_folder)
 
-    time.sleep(3)
 
-    print("\n" + "=" * 60)
+def _run_automation_sequence(platforms, run_id, date_folder):
+    log.info(f"🚀 Starting Unified Social Media Automation for: {date_folder}" + (f" (run {run_id})" if run_id else ""))
+
+    jobs = account_jobs(platforms)
+    # Track success/failure for final report
+    results = {job[0]: False for job in jobs}
+    stats = {}
+    stats_token = _run_stats.set(stats)
+    run_id_token = _current_run_id.set(run_id)
+    started_at = time.monotonic()
+    deadline_token = _run_deadline.set(started_at + RUN_DEADLINE_SECONDS)
 
-    # --- Instagram Post ---
-    print("\n📸 INSTAGRAM POST")
     try:
-        post_to_instagram()
-        results["instagram"] = True
-    except Exception as e:
-        print(f"❌ Instagram post error: {e}")
+        with content_date_in_use(date_folder):
+            # Fetch the image and all captions once, up front, for every platform.
+            bundle = get_content_bundle(date_folder)
 
-    print("\n" + "=" * 60)
-    print("✅ Full Automation Sequence Complete!")
-    print("\n📊 FINAL REPORT:")
-    print(f"   • X (Twitter): {'✅ SUCCESS' if results['x'] else '❌ FAILED'}")
-    print(f"   • LinkedIn Image: {'✅ SUCCESS' if results['linkedin_image'] else '❌ FAILED'}")
-    print(f"   • LinkedIn Article: {'✅ SUCCESS' if results['linkedin_article'] else '❌ FAILED'}")
-    print(f"   • Instagram: {'✅ SUCCESS' if results['instagram'] else '❌ FAILED'}")
-    print("=" * 60)
+            if AUTOMATION_MODE == "parallel" or len({job[4]["name"] for job in jobs}) > 1:
+                _run_jobs_in_parallel(jobs, results, bundle, chained=AUTOMATION_MODE != "parallel")
+            else:
+                _run_jobs_sequentially(jobs, results, bundle)
+    finally:
+        _run_stats.reset(stats_token)
+        _current_run_id.reset(run_id_token)
+        _run_deadline.reset(deadline_token)
+        if run_id:
+            # Release anything that never got to run (e.g. the content fetch raised).
+            for key in results:
+                if not results[key]:
+                    JOB_REGISTRY.mark(date_folder, key, "failed", run_id)
+
+    total_seconds = time.monotonic() - started_at
+    RUN_DURATION.labels(AUTOMATION_MODE).observe(total_seconds)
+    for key, label, *_ in jobs:
+        log.info(f"• {label}: {'✅ SUCCESS' if results[key] else '❌ FAILED'}", extra={"fields": {"job": key}})
+    # One machine-readable summary per run; the lines above are for people reading the log.
+    log.info(
+        f"📊 Full Automation Sequence Complete: {sum(results.values())}/{len(results)} succeeded "
+        f"in {total_seconds:.1f}s ({AUTOMATION_MODE} mode)",
+        extra={"fields": {
+            "results": results, "total_s": round(total_seconds, 1), "mode": AUTOMATION_MODE,
+            "stats": stats, "gemini_cache": GEMINI_CACHE.stats(),
+        }},
+    )
+
+# --- Fork Safety (gunicorn --preload) ---
+
+def _reset_after_fork():
+    """
+    Runs in every forked worker. The master imported the app (and may have built shared
+    objects), but sockets, locks held mid-fork and pool threads do not survive a fork, so
+    each worker starts with fresh locks and lazily rebuilds its own sessions, clients and pools.
+    Read-only state (config, compiled metrics, rate-limit observations) stays copy-on-write.
+    """
+    global _http_sessions, _http_sessions_lock, _gemini_client, _gemini_client_lock
+    global _content_bundles, _content_bundles_lock, _active_content_dates
+    global _x_clients, _x_clients_lock, _x_profile_refreshing
+    global _job_executor, _job_executor_lock, _backfill_executor, _backfill_executor_lock
+
+    _http_sessions, _http_sessions_lock = {}, threading.Lock()
+    _gemini_client, _gemini_client_lock = None, threading.Lock()
+    _content_bundles, _content_bundles_lock, _active_content_dates = {}, threading.Lock(), {}
+    _x_clients, _x_clients_lock, _x_profile_refreshing = {}, threading.Lock(), set()
+    _job_executor, _job_executor_lock = None, threading.Lock()
+    _backfill_executor, _backfill_executor_lock = None, threading.Lock()
+    RATE_LIMITER._lock = threading.Lock()
+    # The master's log listener thread did not survive the fork; records would only pile up.
+    start_log_listener()
+    GEMINI_CACHE._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 # ==============================================================================
 # 8. FLASK ROUTES (The HTTP Interface for Render)
@@ -573,33 +3251,154 @@ def index():
         "status": "Automation Service is Running",
         "endpoint": "/trigger-automation",
         "method": "POST",
-        "date": TODAY_FOLDER
+        "date": current_content_date(),
+        "worker_class": WORKER_CLASS,
+        "accounts": [account["name"] for account in ACCOUNTS],
+        "gemini_cache": GEMINI_CACHE.stats()
     })
 
+
+class InvalidRequestBody(Exception):
+    """A JSON body that is not an object; answered with a 400 by the handler below."""
+
+
+@app.errorhandler(InvalidRequestBody)
+def invalid_request_body(e):
+    return jsonify({"message": "Bad request: the JSON body must be an object."}), 400
+
+
+def _request_param(name):
+    """A parameter from the query string or the JSON body. Raises InvalidRequestBody for non-object JSON."""
+    body = request.get_json(silent=True)
+    if body is not None and not isinstance(body, dict):
+        raise InvalidRequestBody()
+    return request.args.get(name) or (body or {}).get(name)
+
+
+def requires_trigger_key(view):
+    """Answers 403 (logged as a security alert) unless the X-Trigger-Key header matches."""
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        key = request.headers.get("X-Trigger-Key")
+        if key != REQUIRED_TRIGGER_KEY:
+            log.error(f"🛑 Security Alert: Invalid X-Trigger-Key received: {key}")
+            return jsonify({"message": "Forbidden: Invalid trigger key."}), 403
+        return view(*args, **kwargs)
+    return guarded
+
+
 @app.route("/trigger-automation", methods=["POST"])
+@requires_trigger_key
 def social_automation_trigger():
     """
     HTTP endpoint with security and threading to prevent Gunicorn timeout.
-    Requires X-Trigger-Key header for security.
+    Requires X-Trigger-Key header for security. An optional `date` (YYYY-MM-DD, query
+    string or JSON body) posts that content folder instead of today's.
     """
-    # 1. Trigger Key Security Check
-    key = request.headers.get("X-Trigger-Key")
-    if key != REQUIRED_TRIGGER_KEY:
-        print(f"🛑 Security Alert: Invalid X-Trigger-Key received: {key}")
-        return jsonify({"message": "Forbidden: Invalid trigger key."}), 403
+    try:
+        date_folder = parse_content_date(_request_param("date") or current_content_date())
+    except ValueError:
+        return jsonify({"message": "Bad request: date must be YYYY-MM-DD."}), 400
+
+    # 1. Claim the day's jobs and queue a background run (Timeout Fix + single-flight)
+    log.info(f"✅ Trigger Key validated. Claiming jobs for {date_folder}...")
+    outcome = start_automation_run(date_folder)
+
+    if not outcome["claimed"]:
+        log.info(f"♻️ Nothing new to run for {date_folder}: in flight {outcome['in_flight']}, done {outcome['done']}.")
+        return jsonify({
+            "message": "No new run started: every platform is already in flight or done for this date.",
+            "status_code": 200,
+            "date_attempted": date_folder,
+            "coalesced_into": sorted(set(outcome["in_flight"].values())),
+            "in_flight": sorted(outcome["in_flight"]),
+            "done": outcome["done"]
+        }), 200
+
+    # 2. Return an immediate 202 Accepted response
+    log.info(f"✅ Run {outcome['run_id']} queued in background for: {', '.join(outcome['claimed'])}")
+    return jsonify({
+        "message": "Automation sequence started successfully in the background.",
+        "status_code": 202,
+        "date_attempted": date_folder,
+        "run_id": outcome["run_id"],
+        "platforms": outcome["claimed"],
+        "in_flight": sorted(outcome["in_flight"]),
+        "done": outcome["done"]
+    }), 202
 
-    # 2. Start the Automation in a separate thread (Timeout Fix)
-    print(f"✅ Trigger Key validated. Starting automation sequence in background thread...")
-    thread = threading.Thread(target=run_automation_sequence)
-    thread.start()
 
-    # 3. Return an immediate 202 Accepted response
+@app.route("/prewarm", methods=["POST"])
+@requires_trigger_key
+def prewarm_trigger():
+    """
+    Generates and stores the article and Alt Text for `date` (default: today) in the
+    background, ahead of the posting trigger. Requires the X-Trigger-Key header.
+    """
+    try:
+        date_folder = parse_content_date(_request_param("date") or current_content_date())
+    except ValueError:
+        return jsonify({"message": "Bad request: date must be YYYY-MM-DD."}), 400
+
+    future = get_job_executor().submit(prepare_content, date_folder)
+    future.add_done_callback(log_background_failure(f"Prewarm for {date_folder}"))
     return jsonify({
-        "message": "Automation sequence started successfully in the background.",
+        "message": "Prewarm started in the background.",
         "status_code": 202,
-        "date_attempted": TODAY_FOLDER,
-        "platforms": ["X (Twitter)", "LinkedIn", "Instagram"]
+        "date_attempted": date_folder
     }), 202
 
+
+@app.route("/backfill", methods=["POST"])
+@requires_trigger_key
+def backfill_trigger():
+    """
+    Posts every content folder from `start` to `end` (YYYY-MM-DD, query string or JSON body;
+    `end` defaults to today) in the background. Requires the X-Trigger-Key header.
+    """
+    start, end = _request_param("start"), _request_param("end") or current_content_date()
+    if not start:
+        return jsonify({"message": "Bad request: start (YYYY-MM-DD) is required."}), 400
+    try:
+        queued = start_backfill(start, end)
+    except ValueError as e:
+        return jsonify({"message": f"Bad request: {e}"}), 400
+    except requests.exceptions.RequestException as e:
+        log.error(f"🛑 Backfill: could not list content folders: {e}")
+        return jsonify({"message": "Could not list content folders on GitHub."}), 502
+
+    return jsonify({
+        "message": "Backfill queued in the background.",
+        "status_code": 202,
+        "dates": sorted(queued),
+        "max_concurrency": BACKFILL_MAX_CONCURRENCY
+    }), 202
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint: stage latency histograms and platform outcome counters."""
+    return Response(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
+@app.route("/jobs", methods=["GET"])
+def list_jobs():
+    """Job registry and circuit breaker state, optionally filtered with ?date=YYYY-MM-DD. Read-only."""
+    return jsonify({"jobs": JOB_REGISTRY.list(request.args.get("date")), "circuits": CIRCUIT_BREAKERS.snapshot()})
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
+    if len(sys.argv) > 1 and sys.argv[1] == "prewarm":
+        # python app.py prewarm [DATE] -- e.g. from a cron job shortly before the posting trigger.
+        prepare_content(parse_content_date(sys.argv[2]) if len(sys.argv) > 2 else None)
+    elif len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        # python app.py backfill START [END] -- catch up from a shell and wait for every date.
+        if len(sys.argv) not in (3, 4):
+            sys.exit("usage: python app.py backfill START [END]")
+        futures = start_backfill(sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else current_content_date())
+        for date_folder, future in futures.items():
+            if future.exception() is not None:
+                continue  # already logged by its done-callback
+            outcome = future.result()
+            log.info(f"🗓️ {date_folder}: ran {outcome['claimed'] or 'nothing'}, already done {outcome['done']}")
+    else:
+        app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,669 @@
+"""
+Offline benchmark harness for the social media automation service.
+
+Starts local stand-ins for GitHub raw, LinkedIn, the Graph API and X (each on its own
+loopback address, with configurable latency, error and 429 injection), stubs the Gemini
+client, points app.py at them through its endpoint environment variables and measures:
+
+  * wall-clock time of full runs (cold and warm caches),
+  * N concurrent /trigger-automation requests (single-flight coalescing),
+  * per-stage latency percentiles (from app.RECENT_SPANS) and bytes/requests per service.
+
+Nothing leaves the machine. Example:
+
+    python benchmark.py --runs 2 --triggers 5 --latency-ms 80 --rate-limit-rate 0.05
+    python benchmark.py --gevent --triggers 20     # cooperative worker mode
+"""
+import os
+import sys
+
+# Mirror app.py on gevent workers: patch before anything imports sockets or threads.
+if "--gevent" in sys.argv[1:]:
+    os.environ["AUTOMATION_WORKER_CLASS"] = "gevent"
+    from gevent import monkey
+    monkey.patch_all()
+
+import argparse
+import contextlib
+import datetime
+import hashlib
+import io
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+# ==============================================================================
+# 1. FAKE SERVICES
+# ==============================================================================
+
+BENCH_DATE = time.strftime("%Y-%m-%d")
+
+
+def bench_dates(days):
+    """The last `days` content dates, oldest first (the fake GitHub serves the same files for each)."""
+    today = datetime.date.today()
+    return [(today - datetime.timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+
+
+class FaultProfile:
+    """Latency and fault injection shared by every fake service."""
+
+    def __init__(self, latency_s, jitter_s, error_rate, rate_limit_rate, seed):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """Returns (delay seconds, injected status or None) for one request."""
+        with self._lock:
+            delay = max(0.0, self.latency_s + self._rng.uniform(-self.jitter_s, self.jitter_s))
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+
+class FakeService(ThreadingHTTPServer):
+    """Threaded HTTP server that routes every request to `router` and counts traffic."""
+
+    daemon_threads = True
+
+    def __init__(self, name, host, profile, router):
+        super().__init__((host, 0), _FakeHandler)
+        self.name = name
+        self.profile = profile
+        self.router = router
+        self.stats = {"requests": 0, "bytes_in": 0, "bytes_out": 0, "injected_429": 0, "injected_5xx": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, **deltas):
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server.count(requests=1, bytes_in=len(body) + len(self.requestline) + len(str(self.headers)))
+
+        delay, injected = server.profile.draw()
+        time.sleep(delay)
+        if injected == 429:
+            server.count(injected_429=1)
+            status, headers, payload = 429, {"Retry-After": "1", "x-rate-limit-remaining": "0",
+                                             "x-rate-limit-reset": str(int(time.time()) + 1)}, b"{}"
+        elif injected:
+            server.count(injected_5xx=1)
+            status, headers, payload = injected, {}, b"{}"
+        else:
+            url = urlsplit(self.path)
+            status, headers, payload = server.router(self.command, url.path, parse_qs(url.query), self.headers, body)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+        server.count(bytes_out=len(payload))
+
+    do_GET = do_POST = do_PUT = do_HEAD = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+def _json(status, obj, headers=None):
+    return status, {"Content-Type": "application/json", **(headers or {})}, json.dumps(obj).encode("utf-8")
+
+
+def make_image(size_kb):
+    """PNG of roughly size_kb (noise compresses poorly, like a real photo)."""
+    from PIL import Image
+
+    side = max(64, int((size_kb * 1024 / 3) ** 0.5))
+    rng = random.Random(42)
+    image = Image.frombytes("RGB", (side, side), bytes(rng.getrandbits(8) for _ in range(side * side * 3)))
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+
+def github_router(image, captions, folders, image_count=1):
+    """Raw files plus the contents API: the content/ tree lists `folders`, each folder lists its files."""
+    images = {"image.png": image, **{f"image_{n}.png": image for n in range(2, image_count + 1)}}
+    files = {**images, **{name: text.encode("utf-8") for name, text in captions.items()}}
+
+    def route(method, path, query, headers, body):
+        if "/contents/" in path:
+            if re.search(r"/\d{4}-\d{2}-\d{2}$", path):
+                listing = [{"name": name, "type": "file"} for name in sorted(files)]
+            else:
+                listing = [{"name": name, "type": "dir"} for name in folders] + [{"name": "README.md", "type": "file"}]
+            payload = json.dumps(listing).encode("utf-8")
+            etag = f'"{hashlib.md5(payload).hexdigest()}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, b""
+            return 200, {"Content-Type": "application/json", "ETag": etag}, payload
+        data = files.get(path.rsplit("/", 1)[-1])
+        if data is None:
+            return 404, {}, b"404: Not Found"
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, data
+
+    return route
+
+
+def linkedin_router(service_ref, counters):
+    def route(method, path, query, headers, body):
+        if method == "POST" and path.endswith("/assets"):
+            n = counters.bump("linkedin_assets")
+            return _json(200, {"value": {
+                "asset": f"urn:li:digitalmediaAsset:bench{n}",
+                "uploadMechanism": {"com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest": {
+                    "uploadUrl": f"{service_ref[0].base_url}/mediaUpload/bench{n}",
+                }},
+            }})
+        if method == "PUT" and path.startswith("/mediaUpload/"):
+            return 201, {}, b""
+        if method == "POST" and path.endswith("/ugcPosts"):
+            n = counters.bump("linkedin_posts")
+            return _json(201, {"id": f"urn:li:share:{n}"}, {"x-restli-id": f"urn:li:share:{n}"})
+        return _json(404, {"message": f"No route {method} {path}"})
+
+    return route
+
+
+def graph_router(processing_s, counters):
+    containers = {}
+
+    def route(method, path, query, headers, body):
+        usage = {"X-App-Usage": json.dumps({"call_count": 5, "total_time": 2, "total_cputime": 1})}
+        parts = path.strip("/").split("/")
+        if method == "POST" and parts[-1] == "media":
+            container_id = f"17{counters.bump('ig_containers'):06d}"
+            containers[container_id] = time.monotonic()
+            return _json(200, {"id": container_id}, usage)
+        if method == "POST" and parts[-1] == "media_publish":
+            return _json(200, {"id": f"18{counters.bump('ig_published'):06d}"}, usage)
+        if method == "GET" and parts[-1] in containers:
+            ready = time.monotonic() - containers[parts[-1]] >= processing_s
+            return _json(200, {"id": parts[-1], "status_code": "FINISHED" if ready else "IN_PROGRESS"}, usage)
+        if method == "GET" and "business_discovery" in query.get("fields", [""])[0]:
+            username = re.search(r"username\(([^)]+)\)", query["fields"][0]).group(1)
+            return _json(200, {"business_discovery": {"id": f"bd-{username}", "username": username}}, usage)
+        return _json(404, {"error": {"message": f"No route {method} {path}"}})
+
+    return route
+
+
+def x_router(counters):
+    def route(method, path, query, headers, body):
+        limits = {"x-rate-limit-limit": "300", "x-rate-limit-remaining": "299",
+                  "x-rate-limit-reset": str(int(time.time()) + 900)}
+        if path.endswith("/media/upload.json"):
+            if headers.get("Content-Type", "").startswith("multipart/"):
+                counters.bump("x_append")
+                return 204, {}, b""
+            form = parse_qs(body.decode("utf-8")) if method == "POST" else query
+            command = form.get("command", [""])[0]
+            media_id = form.get("media_id", [None])[0] or f"16{counters.bump('x_media'):06d}"
+            return _json(202 if command == "INIT" else 200, {"media_id_string": media_id}, limits)
+        if method == "POST" and path == "/2/tweets":
+            return _json(201, {"data": {"id": f"15{counters.bump('x_tweets'):06d}", "text": "bench"}}, limits)
+        if method == "GET" and path == "/2/users/me":
+            return _json(200, {"data": {"id": "1", "name": "Bench", "username": "bench_account"}}, limits)
+        return _json(404, {"title": f"No route {method} {path}"})
+
+    return route
+
+
+class Counters:
+    def __init__(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def bump(self, name):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + 1
+            return self.values[name]
+
+
+class RebaseAdapter(HTTPAdapter):
+    """Sends requests for a hard-coded SDK host (tweepy's api.twitter.com) to a local fake."""
+
+    def __init__(self, source, target):
+        super().__init__()
+        self.source = source
+        self.target = target
+
+    def send(self, request, **kwargs):
+        request.url = request.url.replace(self.source, self.target, 1)
+        return super().send(request, **kwargs)
+
+
+# ==============================================================================
+# 2. STUBBED GEMINI CLIENT
+# ==============================================================================
+
+BENCH_ARTICLE = (
+    "REAL-WORLD DIGITAL MARKETING TIPS AND TRICKS\n\n"
+    "1. Know your audience\n\nShared by KISHORE S (@growwithkishore).\n\n#DigitalMarketing"
+)
+
+
+class FakeGeminiModels:
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _text(self, config):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_s)
+        schema = (config or {}).get("response_schema")
+        if schema:
+            return json.dumps({key: f"Digital marketing tips graphic for {key} by KISHORE S of growwithkishore."
+                               for key in schema["properties"]})
+        return BENCH_ARTICLE
+
+    def generate_content(self, model, contents, config=None):
+        return types.SimpleNamespace(text=self._text(config))
+
+    def generate_content_stream(self, model, contents, config=None):
+        text = self._text(config)
+        for start in range(0, len(text), 64):
+            yield types.SimpleNamespace(text=text[start:start + 64])
+
+
+# ==============================================================================
+# 3. HARNESS
+# ==============================================================================
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.counters = Counters()
+        profile = FaultProfile(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate,
+                               args.rate_limit_rate, args.seed)
+        captions = {
+            "caption_linkedin.txt": "Five quick wins for your LinkedIn funnel. #marketing",
+            "caption_instagram.txt": "Swipe-worthy growth tips for small brands. #growth",
+            "caption_x.txt": "Three growth tips in under 280 characters. #marketing",
+        }
+        linkedin_ref = []
+        github = github_router(make_image(args.image_kb), captions, bench_dates(max(1, args.backfill_days)), args.images)
+        self.services = {
+            "github": FakeService("github", "127.0.0.11", profile, github),
+            "linkedin": FakeService("linkedin", "127.0.0.12", profile, linkedin_router(linkedin_ref, self.counters)),
+            "graph": FakeService("graph", "127.0.0.13", profile, graph_router(args.ig_processing_s, self.counters)),
+            "x": FakeService("x", "127.0.0.14", profile, x_router(self.counters)),
+        }
+        linkedin_ref.append(self.services["linkedin"])
+        for service in self.services.values():
+            threading.Thread(target=service.serve_forever, name=f"fake-{service.name}", daemon=True).start()
+        self.gemini = FakeGeminiModels(args.gemini_latency_ms / 1000)
+        self.app = None
+
+    def configure_app(self):
+        """Points app.py at the fakes through its environment variables, then imports it."""
+        state_dir = tempfile.mkdtemp(prefix="automation-bench-")
+        os.environ.update({
+            "AUTOMATION_STATE_DIR": state_dir,
+            "AUTOMATION_MODE": self.args.mode,
+            "GITHUB_RAW_ROOT_URL": self.services["github"].base_url,
+            "GITHUB_API_BASE_URL": self.services["github"].base_url,
+            "LINKEDIN_API_BASE_URL": f"{self.services['linkedin'].base_url}/v2",
+            "GRAPH_API_BASE_URL": f"{self.services['graph'].base_url}/v17.0",
+            "X_MEDIA_UPLOAD_URL": f"{self.services['x'].base_url}/1.1/media/upload.json",
+            "GEMINI_API_KEY": "bench", "ACCESS_TOKEN_LI": "bench", "PERSON_URN": "urn:li:person:bench",
+            "ACCESS_TOKEN_IG": "bench", "INSTAGRAM_BUSINESS_ID": "1789",
+            "CONSUMER_KEY": "bench", "CONSUMER_SECRET": "bench",
+            "X_ACCESS_TOKEN": "bench", "X_ACCESS_SECRET": "bench",
+            # Extra accounts post the same shared content with their own (fake) credentials.
+            "AUTOMATION_ACCOUNTS": json.dumps([
+                {"name": f"brand{index}", "ACCESS_TOKEN_LI": "bench", "PERSON_URN": f"urn:li:person:brand{index}",
+                 "ACCESS_TOKEN_IG": "bench", "INSTAGRAM_BUSINESS_ID": "1789",
+                 "CONSUMER_KEY": "bench", "CONSUMER_SECRET": "bench",
+                 "X_ACCESS_TOKEN": f"brand{index}", "X_ACCESS_SECRET": "bench"}
+                for index in range(2, self.args.accounts + 1)
+            ]),
+        })
+        # app.py logs through a background queue to stderr: readable text with --verbose, else nothing.
+        os.environ.setdefault("LOG_FORMAT", "text")
+        os.environ.setdefault("LOG_LEVEL", "INFO" if self.args.verbose else "CRITICAL")
+        with self.quiet():
+            import app
+        self.app = app
+        app._gemini_client = types.SimpleNamespace(models=self.gemini)
+        for account in app.ACCOUNTS:
+            client, _ = app.get_x_clients(account)
+            client.session.mount("https://api.twitter.com",
+                                 RebaseAdapter("https://api.twitter.com", self.services["x"].base_url))
+        return app
+
+    @contextlib.contextmanager
+    def quiet(self):
+        if self.args.verbose:
+            yield
+            return
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+    # Posting state (and circuit breakers, so one run's faults don't skip the next) is always
+    # forgotten; the rest of the state database are caches.
+    POSTING_TABLES = ("jobs", "steps", "circuits")
+    CACHE_TABLES = ("prepared_content", "instagram_tags")
+
+    def reset_state(self, keep_caches):
+        """Forgets posted jobs/steps so the next run posts again; optionally drops every cache too."""
+        import sqlite3
+
+        app = self.app
+        conn = app.connect_state_db(app.JOB_DB_PATH)
+        try:
+            for table in self.POSTING_TABLES + (() if keep_caches else self.CACHE_TABLES):
+                try:
+                    conn.execute(f"DELETE FROM {table}")
+                except sqlite3.OperationalError:
+                    pass  # not created yet
+        finally:
+            conn.close()
+        if not keep_caches:
+            import shutil
+            shutil.rmtree(app.CONTENT_CACHE_DIR, ignore_errors=True)
+            shutil.rmtree(app.IMAGE_DERIVATIVE_DIR, ignore_errors=True)
+            if os.path.exists(app.GEMINI_CACHE_PATH):
+                os.remove(app.GEMINI_CACHE_PATH)
+            app.GEMINI_CACHE._entries.clear()
+            app.GEMINI_CACHE._mtime = None
+            app._content_bundles.clear()
+
+    def _begin(self):
+        self.app.RECENT_SPANS.clear()
+        for service in self.services.values():
+            service.reset_stats()
+        self.counters.values.clear()
+        self.gemini.calls = 0
+        return time.perf_counter()
+
+    def _finish(self, name, started, extra=None):
+        wall = time.perf_counter() - started
+        spans = {}
+        for platform, stage, outcome, seconds in list(self.app.RECENT_SPANS):
+            spans.setdefault(f"{platform}.{stage}", []).append(seconds)
+        return {
+            "scenario": name,
+            "wall_clock_s": round(wall, 3),
+            "stages": {
+                key: {"n": len(values), "p50": round(percentile(values, 50), 3),
+                      "p90": round(percentile(values, 90), 3), "p99": round(percentile(values, 99), 3)}
+                for key, values in sorted(spans.items())
+            },
+            "services": {name: dict(service.stats) for name, service in self.services.items()},
+            "posts": dict(self.counters.values),
+            "gemini_calls": self.gemini.calls,
+            **(extra or {}),
+        }
+
+    def prewarm(self, dates):
+        """Runs the prewarm stage for the dates outside the measured window."""
+        with self.quiet():
+            for date_folder in dates:
+                self.app.prepare_content(date_folder)
+
+    def full_run(self, name):
+        started = self._begin()
+        with self.quiet():
+            self.app.run_automation_sequence()
+        return self._finish(name, started)
+
+    def backfill(self, days):
+        """Backfills the last `days` dates through app.start_backfill and waits for all of them."""
+        dates = bench_dates(days)
+        started = self._begin()
+        with self.quiet():
+            futures = self.app.start_backfill(dates[0], dates[-1])
+            for future in futures.values():
+                future.result(timeout=self.args.timeout_s)
+        return self._finish(f"backfill of {days} days", started, {"dates": len(futures)})
+
+    def concurrent_triggers(self, count):
+        """Fires `count` simultaneous triggers through Flask and waits for every claimed job."""
+        client = self.app.app.test_client()
+        headers = {"X-Trigger-Key": self.app.REQUIRED_TRIGGER_KEY}
+        responses = []
+        barrier = threading.Barrier(count)
+
+        def fire():
+            barrier.wait()
+            responses.append(client.post("/trigger-automation", headers=headers).get_json())
+
+        started = self._begin()
+        with self.quiet():
+            threads = [threading.Thread(target=fire) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            deadline = time.monotonic() + self.args.timeout_s
+            while time.monotonic() < deadline:
+                jobs = self.app.JOB_REGISTRY.list()
+                if jobs and all(job["state"] in ("succeeded", "failed") for job in jobs):
+                    break
+                time.sleep(0.1)
+        run_ids = {r.get("run_id") for r in responses if r and r.get("run_id")}
+        return self._finish(f"{count} concurrent triggers", started, {
+            "runs_started": len(run_ids),
+            "coalesced_triggers": count - len(run_ids),
+        })
+
+
+# ==============================================================================
+# 4. STARTUP (cold start & preload memory)
+# ==============================================================================
+
+# Runs in a fresh interpreter: import app, answer "/", then fork a "worker" the way
+# gunicorn --preload does and see how much memory the child has to own privately.
+STARTUP_PROBE = r"""
+import json, os, sys, time
+
+def status_kb(field, pid="self"):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+def rollup_kb(pid="self"):
+    totals = {"private": 0, "shared": 0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name.startswith("Private_"):
+                totals["private"] += int(rest.split()[0])
+            elif name.startswith("Shared_"):
+                totals["shared"] += int(rest.split()[0])
+    return totals
+
+started = time.perf_counter()
+import app
+result = {"import_s": time.perf_counter() - started}
+started = time.perf_counter()
+app.app.test_client().get("/")
+result["first_health_s"] = time.perf_counter() - started
+result["rss_kb"] = status_kb("VmRSS")
+result["heavy_modules_loaded"] = [m for m in ("google.genai", "tweepy", "PIL.Image") if m in sys.modules]
+
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    os.close(read_fd)
+    started = time.perf_counter()
+    app.app.test_client().get("/")
+    child = {"worker_health_s": time.perf_counter() - started, "worker_rss_kb": status_kb("VmRSS")}
+    child.update({f"worker_{k}_kb": v for k, v in rollup_kb().items()})
+    os.write(write_fd, json.dumps(child).encode())
+    os._exit(0)
+os.close(write_fd)
+with os.fdopen(read_fd) as pipe:
+    result.update(json.loads(pipe.read()))
+os.waitpid(pid, 0)
+
+# What the lazy imports defer to the first post.
+started = time.perf_counter()
+from google import genai
+import tweepy
+from PIL import Image
+result["deferred_sdk_import_s"] = time.perf_counter() - started
+print(json.dumps(result))
+"""
+
+
+def startup_benchmark(samples):
+    """Median cold-start figures over `samples` fresh interpreters."""
+    import statistics
+    import subprocess
+
+    env = dict(os.environ, AUTOMATION_STATE_DIR=tempfile.mkdtemp(prefix="automation-startup-"))
+    env.pop("AUTOMATION_WORKER_CLASS", None)
+    runs = []
+    for _ in range(samples):
+        out = subprocess.run([sys.executable, "-c", STARTUP_PROBE], env=env, capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    report = {"scenario": f"startup (median of {samples})"}
+    for key, value in runs[0].items():
+        report[key] = statistics.median(run[key] for run in runs) if isinstance(value, (int, float)) else value
+    return report
+
+
+def print_startup_report(report):
+    print(f"\n=== {report['scenario']} ===")
+    print(f"import app: {report['import_s'] * 1000:.0f} ms   first /: {report['first_health_s'] * 1000:.1f} ms   "
+          f"RSS: {report['rss_kb'] / 1024:.1f} MiB   heavy SDKs loaded: {report['heavy_modules_loaded'] or 'none'}")
+    print(f"preloaded worker: first / {report['worker_health_s'] * 1000:.1f} ms, "
+          f"private {report['worker_private_kb'] / 1024:.1f} MiB, shared {report['worker_shared_kb'] / 1024:.1f} MiB")
+    print(f"deferred to first post: {report['deferred_sdk_import_s'] * 1000:.0f} ms of SDK imports")
+
+
+# ==============================================================================
+# 5. REPORTING & CLI
+# ==============================================================================
+
+def print_report(report):
+    print(f"\n=== {report['scenario']} ===")
+    print(f"wall clock: {report['wall_clock_s']:.2f}s   gemini calls: {report['gemini_calls']}   posts: {report['posts']}")
+    for key in ("runs_started", "coalesced_triggers", "dates"):
+        if key in report:
+            print(f"{key}: {report[key]}")
+    print(f"{'stage':<34}{'n':>4}{'p50':>9}{'p90':>9}{'p99':>9}")
+    for key, stage in report["stages"].items():
+        print(f"{key:<34}{stage['n']:>4}{stage['p50']:>9.3f}{stage['p90']:>9.3f}{stage['p99']:>9.3f}")
+    print(f"{'service':<12}{'requests':>9}{'bytes in':>12}{'bytes out':>12}{'429s':>6}{'5xx':>6}")
+    for name, stats in report["services"].items():
+        print(f"{name:<12}{stats['requests']:>9}{stats['bytes_in']:>12,}{stats['bytes_out']:>12,}"
+              f"{stats['injected_429']:>6}{stats['injected_5xx']:>6}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for app.py's posting pipeline.")
+    parser.add_argument("--mode", choices=("sequential", "parallel"), default=os.getenv("AUTOMATION_MODE", "parallel"))
+    parser.add_argument("--startup", type=int, default=0, metavar="N",
+                        help="only measure cold start (import time, RSS, preload sharing) over N interpreters")
+    parser.add_argument("--gevent", action="store_true", help="run app.py the way gevent workers do")
+    parser.add_argument("--runs", type=int, default=2, help="full runs; the first is cold, later ones reuse caches")
+    parser.add_argument("--cold", action="store_true", help="drop every cache between runs")
+    parser.add_argument("--triggers", type=int, default=0, help="concurrent /trigger-automation requests")
+    parser.add_argument("--prewarm", action="store_true", help="prewarm Gemini content before each measured run")
+    parser.add_argument("--backfill-days", type=int, default=0, help="backfill this many past dates")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--ig-processing-s", type=float, default=3.0, help="time until IG containers are FINISHED")
+    parser.add_argument("--gemini-latency-ms", type=float, default=1500)
+    parser.add_argument("--image-kb", type=int, default=1024)
+    parser.add_argument("--images", type=int, default=1, help="images per content folder (carousel / multi-image)")
+    parser.add_argument("--accounts", type=int, default=1, help="accounts posting each run (multi-account fan-out)")
+    parser.add_argument("--timeout-s", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show app.py's own output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.startup:
+        report = startup_benchmark(args.startup)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_startup_report(report)
+        return 0
+
+    harness = Harness(args)
+    harness.configure_app()
+
+    reports = []
+    for index in range(args.runs):
+        harness.reset_state(keep_caches=index > 0 and not args.cold)
+        if args.prewarm:
+            harness.prewarm([BENCH_DATE])
+        label = "cold" if index == 0 or args.cold else "warm"
+        reports.append(harness.full_run(f"full run #{index + 1} ({label}, {args.mode})"))
+    if args.triggers:
+        harness.reset_state(keep_caches=not args.cold)
+        reports.append(harness.concurrent_triggers(args.triggers))
+    if args.backfill_days:
+        harness.reset_state(keep_caches=not args.cold)
+        if args.prewarm:
+            harness.prewarm(bench_dates(args.backfill_days))
+        reports.append(harness.backfill(args.backfill_days))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
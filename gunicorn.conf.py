@@ -0,0 +1,23 @@
+"""
+Gunicorn settings (loaded automatically from the working directory).
+
+AUTOMATION_WORKER_CLASS=gevent runs cooperative gevent workers: app.py monkey-patches the
+stdlib before its own imports, so the trigger handler, background runs, Instagram polling
+and uploads are all greenlets and one small instance can keep many jobs in flight while
+still answering health checks. The default stays on the original sync workers.
+
+The app is preloaded in the master and forked into workers, so imports and config are paid
+once and shared copy-on-write; app.py resets sessions, locks and pools in each child.
+GUNICORN_PRELOAD=0 restores per-worker imports.
+"""
+import os
+
+worker_class = os.getenv("AUTOMATION_WORKER_CLASS", "sync").strip().lower()
+# Make the choice visible to app.py in the workers.
+os.environ["AUTOMATION_WORKER_CLASS"] = worker_class
+
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Concurrent connections per gevent worker (ignored by sync workers).
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "90"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").strip().lower() not in ("0", "false", "no")